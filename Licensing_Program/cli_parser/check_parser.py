@@ -1,6 +1,28 @@
 """Submodule for creating parser command 'check-project'.
 """
 
+import argparse
+
+
+def _thread_count(value):
+    """Argument type of a thread count, a non-negative integer. Rejected
+    values are reported through the parser's `error`.
+    """
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid thread count: {!r}".format(value)
+        )
+
+    if count < 0:
+        raise argparse.ArgumentTypeError(
+            "thread count must be 0 or more, not {}".format(count)
+        )
+
+    return count
+
+
 def add_command(subparser):
     """Add 'check-project' command to a subparser.
     """
@@ -23,5 +45,14 @@ def add_command(subparser):
         nargs="+",
         help="check these files only",
     )
+    parser_check.add_argument(
+        "-j",
+        "--threads",
+        metavar="N",
+        type=_thread_count,
+        default=0,
+        help=("scan project directories with N threads, for network mounted"
+              " projects; 0 walks them serially (default: %(default)s)"),
+    )
 
     return subparser
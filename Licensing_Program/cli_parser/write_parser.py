@@ -1,6 +1,8 @@
 """Submodule for creating parser command 'write'.
 """
 
+import utils.ranking
+
 
 def add_command(subparser):
     """Add 'write' command to a subparser.
@@ -30,4 +32,12 @@ def add_command(subparser):
               " files, don't write project license file"),
     )
 
+    parser_write.add_argument(
+        "--ranking-algorithm",
+        choices=sorted(utils.ranking.algorithm_dict.keys()),
+        default="ratcliff-obershelp",
+        help=("algorithm used to rank how closely existing headers match"
+              " each license (default: %(default)s)"),
+    )
+
     return subparser
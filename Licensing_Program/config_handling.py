@@ -3,6 +3,7 @@ configuration.
 """
 
 import collections
+import functools
 import json
 import os.path
 import re
@@ -18,6 +19,14 @@ import userfiles_handling
 
 CONFIG_FILENAME = ".licensing.json"
 
+# compiled 'IgnoredFiles' patterns, matched with `re.match` against POSIX
+# paths relative to the project directory. `file_regex` matches ignored
+# files, `dir_regex` matches directories holding nothing but ignored files.
+IgnoreMatcher = collections.namedtuple(
+    "IgnoreMatcher",
+    ["file_regex", "dir_regex"],
+)
+
 CONFIG_SCHEMA = {
     "properties": {
         "CommentedFiles": {
@@ -189,13 +198,60 @@ def param_ignoredfiles_to_regex(ignore_string):
     an ant pattern is assumed.
     """
     if ignore_string.startswith("re:"):
-        return ignore_string.lstrip("re:")
+        return ignore_string[len("re:"):]
     elif ignore_string.startswith("ant:"):
-        return antpattern_to_regex(ignore_string.lstrip("ant:"))
+        return antpattern_to_regex(ignore_string[len("ant:"):])
     else:
         return antpattern_to_regex(ignore_string)
 
 
+def param_ignoredfiles_to_dir_regex(ignore_string):
+    """Converts a configuration pattern for 'IgnoredFiles' to a regex string
+    of the directories whose files all match it, or `None` if no directory
+    is wholly ignored. Only ant patterns ending in '/**' ignore directories,
+    as there is no telling which paths a 're:' pattern leaves out.
+    """
+    if ignore_string.startswith("re:"):
+        return None
+    elif ignore_string.startswith("ant:"):
+        ignore_string = ignore_string[len("ant:"):]
+
+    dir_pattern = ignore_string[:-len("/**")]
+
+    if ignore_string.endswith("/**") and dir_pattern:
+        return antpattern_to_regex(dir_pattern)
+    else:
+        return None
+
+
+def _regex_union(regexes):
+    """Returns a compiled regex matching where any of `regexes` matches, or
+    never if there are none.
+    """
+    return re.compile(
+        "|".join("(?:{})".format(regex) for regex in regexes) or "(?!)"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def compile_ignoredfiles(ignore_strings):
+    """Returns an `IgnoreMatcher` of every 'IgnoredFiles' pattern of the
+    tuple `ignore_strings`, compiled once per tuple.
+    """
+    return IgnoreMatcher(
+        file_regex=_regex_union(
+            param_ignoredfiles_to_regex(ignore_string)
+            for ignore_string in ignore_strings
+        ),
+        dir_regex=_regex_union(
+            dir_regex
+            for dir_regex in map(param_ignoredfiles_to_dir_regex,
+                                 ignore_strings)
+            if dir_regex is not None
+        ),
+    )
+
+
 def load_configfile(cwd=".", info_level=""):
     """Parses the project config file in 'cwd'. If the 'jsonschema' module is
     available, the config file is checked for data errors.
@@ -217,6 +273,15 @@ def load_configfile(cwd=".", info_level=""):
     return config
 
 
+def ignore_matcher(config):
+    """Returns the `IgnoreMatcher` of the 'IgnoredFiles' of `config`, or of
+    the default ones if it has none.
+    """
+    return compile_ignoredfiles(
+        tuple(config.get("IgnoredFiles", CONFIG_DEFAULT["IgnoredFiles"]))
+    )
+
+
 def write_default_configfile(cwd="."):
     """This function generates and writes a simple configuration file
     with filler values.
@@ -1,24 +1,19 @@
 from itertools import islice
 
 import matplotlib.pyplot as plt
+import numpy
 
 # bar graph showing number of files per license
-def bar_graph_manual_licenses(cursor, colorlist):
-    cursor = cursor.execute("""
-        SELECT
-          licenses.name,
-          COUNT(*)
-        FROM
-              project_files
-          JOIN
-              licenses
-            ON
-              project_files.manual_license = licenses.id
-        GROUP BY
-          project_files.manual_license
-    """)
+def bar_graph_manual_licenses(ranking_data, colorlist):
+    license_ids, counts = numpy.unique(
+        ranking_data.manual_licenses[ranking_data.manual_licenses != -1],
+        return_counts=True,
+    )
 
-    data = { license : count for license, count in cursor }
+    data = {
+        ranking_data.license_names[license_id] : count
+        for license_id, count in zip(license_ids.tolist(), counts.tolist())
+    }
 
     data_keys, data_values = zip(
         *sorted(
@@ -47,7 +42,7 @@ def bar_graph_manual_licenses(cursor, colorlist):
         tick_label=data_keys,
         align="center",
         color=list(islice(colorlist, 1)),
-        edgecolor="",
+        edgecolor="none",
     )
 
     files_per_license_zoomed_ax.barh(
@@ -56,7 +51,7 @@ def bar_graph_manual_licenses(cursor, colorlist):
         tick_label=data_keys,
         align="center",
         color=list(islice(colorlist, 1)),
-        edgecolor="",
+        edgecolor="none",
     )
 
     files_per_license_ax.set_xlabel("# of files")
@@ -68,3 +63,5 @@ def bar_graph_manual_licenses(cursor, colorlist):
 
     files_per_license_ax.grid(axis="x")
     files_per_license_zoomed_ax.grid(axis="x")
+
+    return files_per_license_fig
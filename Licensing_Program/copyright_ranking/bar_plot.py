@@ -1,56 +1,60 @@
 #! /usr/bin/env python3
 
-import collections
-import csv
-
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
+from plot_arrays import adjust_ratios_by_total_header_lines
+from ranking_data import load_csv_arrays
+
 CONFIG = {}
 CONFIG["FairTotalLines"] = 16
-
-
-def adjust_ratio_by_total_header_lines(ratio, total_lines):
-    if total_lines >= CONFIG["FairTotalLines"]:
-        return ratio
-    else:
-        return ratio ** ((CONFIG["FairTotalLines"] / total_lines) ** (1 / 4))
-
-
-if __name__ == "__main__":
-    with open("header_info.csv", "rt") as header_csv:
-        header_info = csv.DictReader(header_csv)
-
-        header_info = dict(
-            (row["header_name"], int(row["total_lines"]))
-            for row in header_info
+CONFIG["HeaderLinesCSV"] = "header_info.csv"
+CONFIG["CalculatedRankingsCSV"] = "specfem3d_info.csv"
+# arrays read from the CSV files, `None` parses them every run
+CONFIG["SnapshotFile"] = "specfem3d_info.npz"
+
+
+def bar_plot_figures(arrays):
+    """Returns a dictionary of license names to figures of the cumulative
+    distributions of the diff and Levenshtein ratios of `arrays`.
+    """
+    header_info = dict(
+        zip(
+            arrays["header_names"].tolist(),
+            arrays["header_total_lines"].tolist(),
         )
+    )
+
+    # a snapshot reads its arrays on every access
+    licenses = arrays["license"]
+    diff_ratios = arrays["diff_ratio"]
+    levenshtein_ratios = arrays["levenshtein_ratio"]
+    total_lines = arrays["header_total_lines"][licenses]
+
+    adjusted_diff_ratios = adjust_ratios_by_total_header_lines(
+        diff_ratios,
+        total_lines,
+        CONFIG["FairTotalLines"],
+    )
+    adjusted_levenshtein_ratios = adjust_ratios_by_total_header_lines(
+        levenshtein_ratios,
+        total_lines,
+        CONFIG["FairTotalLines"],
+    )
+
+    data = {license : {} for license in header_info}
+
+    for index, license in enumerate(arrays["header_names"].tolist()):
+        rows = licenses == index
+
+        if rows.any():
+            data[license]["diff"] = diff_ratios[rows]
+            data[license]["levenshtein"] = levenshtein_ratios[rows]
 
-    with open("specfem3d_info.csv", "rt") as specfem3d_csv:
-        specfem3d_info = csv.DictReader(specfem3d_csv)
-
-        data = {
-            license : collections.defaultdict(list) for license in header_info
-        }
-
-        for row in specfem3d_info:
-            data[row["license_name"]]["diff"].append(float(row["diff_ratio"]))
-            data[row["license_name"]]["levenshtein"].append(
-                float(row["levenshtein_ratio"])
-            )
-
-            if header_info[row["license_name"]] < CONFIG["FairTotalLines"]:
-                data[row["license_name"]]["adjusted_diff"].append(
-                    adjust_ratio_by_total_header_lines(
-                        float(row["diff_ratio"]),
-                        header_info[row["license_name"]],
-                    )
-                )
-                data[row["license_name"]]["adjusted_levenshtein"].append(
-                    adjust_ratio_by_total_header_lines(
-                        float(row["levenshtein_ratio"]),
-                        header_info[row["license_name"]],
-                    )
+            if header_info[license] < CONFIG["FairTotalLines"]:
+                data[license]["adjusted_diff"] = adjusted_diff_ratios[rows]
+                data[license]["adjusted_levenshtein"] = (
+                    adjusted_levenshtein_ratios[rows]
                 )
 
     license_figs = {license : plt.figure() for license in header_info}
@@ -69,7 +73,7 @@ if __name__ == "__main__":
                 data_types[data_name],
                 bins=100,
                 range=(0.0, 1.0),
-                normed=True,
+                density=True,
                 cumulative=-1,
                 color="teal",
                 edgecolor="none",
@@ -78,6 +82,12 @@ if __name__ == "__main__":
             ax.set_ylim(0.0, 1.0)
             ax.grid(True)
 
+    return license_figs
+
+
+if __name__ == "__main__":
+    bar_plot_figures(load_csv_arrays(CONFIG))
+
     plt.show()
 
 
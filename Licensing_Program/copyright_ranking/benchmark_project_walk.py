@@ -0,0 +1,159 @@
+#! /usr/bin/env python3
+
+import os
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+
+import config_handling
+import utils.filepaths_gen as filepaths_gen
+
+CONFIG = {
+    # synthetic tree, created on the first run and reused after
+    "TreeDir" : "walk_benchmark_tree",
+    # `DirFanout` ** 2 leaf directories of `FilesPerDir` files each
+    "DirFanout" : 100,
+    "FilesPerDir" : 100,
+    # files of an ignored `.git` directory in every top directory
+    "IgnoredFilesPerDir" : 20,
+    "IgnoredFiles" : ["**/.git/**"],
+    # threads of the parallel walks, `None` uses the thread pool default
+    "WalkThreads" : None,
+}
+
+
+def make_tree(tree_dir):
+    """Creates a tree of empty files in `tree_dir`, unless it exists.
+    Returns the amount of entries of the tree.
+    """
+    entry_count = (
+        CONFIG["DirFanout"]
+        * (1 + CONFIG["DirFanout"] * (1 + CONFIG["FilesPerDir"])
+           + 1 + CONFIG["IgnoredFilesPerDir"])
+    )
+
+    if os.path.isdir(tree_dir):
+        return entry_count
+
+    for top in range(CONFIG["DirFanout"]):
+        top_dir = os.path.join(tree_dir, "dir{:03}".format(top))
+        git_dir = os.path.join(top_dir, ".git")
+        os.makedirs(git_dir)
+
+        for index in range(CONFIG["IgnoredFilesPerDir"]):
+            os.close(os.open(
+                os.path.join(git_dir, "object{:04}".format(index)),
+                os.O_CREAT | os.O_WRONLY,
+            ))
+
+        for sub in range(CONFIG["DirFanout"]):
+            sub_dir = os.path.join(top_dir, "sub{:03}".format(sub))
+            os.mkdir(sub_dir)
+
+            for index in range(CONFIG["FilesPerDir"]):
+                os.close(os.open(
+                    os.path.join(sub_dir, "file{:04}.f90".format(index)),
+                    os.O_CREAT | os.O_WRONLY,
+                ))
+
+    return entry_count
+
+
+def os_walk_relpaths(tree_dir, ignore_matcher):
+    """The walk the project walkers did before `relpaths_gen`: `os.walk`,
+    a `relpath` of the `abspath` of every file and the ignore check after
+    the walk.
+    """
+    for cwd, dirs, files in os.walk(tree_dir):
+        for file in files:
+            relpath = os.path.relpath(
+                os.path.abspath(os.path.join(cwd, file)),
+                tree_dir,
+            )
+
+            if not ignore_matcher.file_regex.match(relpath):
+                yield relpath
+
+
+def pathlib_relpaths(tree_dir, ignore_matcher):
+    """The walk `filepaths_gen` did before `relpaths_gen`: `os.walk` with a
+    `relative_to` of a `pathlib.PurePosixPath` of every entry.
+    """
+    for cwd, dirs, files in os.walk(tree_dir):
+        for file in files:
+            path = pathlib.PurePosixPath(cwd, file).relative_to(tree_dir)
+
+            if not ignore_matcher.file_regex.match(str(path)):
+                yield path
+
+
+def scandir_relpaths(tree_dir, ignore_matcher):
+    return filepaths_gen.relpaths_gen(
+        tree_dir,
+        include_hidden=True,
+        ignore_matcher=ignore_matcher,
+    )
+
+
+def scandir_entries(tree_dir, ignore_matcher):
+    return filepaths_gen.relpaths_gen(
+        tree_dir,
+        include_hidden=True,
+        ignore_matcher=ignore_matcher,
+        with_entries=True,
+    )
+
+
+def parallel_relpaths(tree_dir, ignore_matcher):
+    return filepaths_gen.parallel_relpaths_gen(
+        tree_dir,
+        include_hidden=True,
+        ignore_matcher=ignore_matcher,
+        threads=CONFIG["WalkThreads"],
+    )
+
+
+def parallel_sorted_relpaths(tree_dir, ignore_matcher):
+    return filepaths_gen.parallel_relpaths_gen(
+        tree_dir,
+        include_hidden=True,
+        ignore_matcher=ignore_matcher,
+        threads=CONFIG["WalkThreads"],
+        sort=True,
+    )
+
+
+walker_dict = {
+    "os.walk + relpath" : os_walk_relpaths,
+    "os.walk + pathlib" : pathlib_relpaths,
+    "relpaths_gen" : scandir_relpaths,
+    "relpaths_gen entries" : scandir_entries,
+    "parallel" : parallel_relpaths,
+    "parallel sorted" : parallel_sorted_relpaths,
+}
+
+
+if __name__ == "__main__":
+    tree_dir = os.path.abspath(CONFIG["TreeDir"])
+    entry_count = make_tree(tree_dir)
+    ignore_matcher = config_handling.compile_ignoredfiles(
+        tuple(CONFIG["IgnoredFiles"])
+    )
+
+    print("{} entries in {}".format(entry_count, tree_dir))
+
+    for name, walker in walker_dict.items():
+        start = time.perf_counter()
+        file_count = sum(1 for _ in walker(tree_dir, ignore_matcher))
+        seconds = time.perf_counter() - start
+
+        print(
+            "{:20} {:8.2f}s {:10.0f} files/s {:8} files".format(
+                name,
+                seconds,
+                file_count / seconds,
+                file_count,
+            )
+        )
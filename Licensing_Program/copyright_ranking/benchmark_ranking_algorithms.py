@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+
+import collections
+import csv
+import pathlib
+import time
+
+import copyright_ranking  # adds Licensing_Program to `sys.path`
+import utils.header_region as header_region
+import utils.ranking.windows as windows
+
+CONFIG = {
+    "ProjectDir" : pathlib.Path("specfem3d").absolute(),
+    "ManualCheckCSV" : "specfem3d_file_licenses.csv",
+    "Algorithms" : ["ratcliff-obershelp", "line-hash", "levenshtein"],
+}
+
+
+def predicted_license(ranks):
+    """Returns the name of the top ranked license or 'NOLICENSE' if no rank
+    reaches the ranking `RankMin`.
+    """
+    rank, _, _, license = max(ranks)
+
+    if rank >= copyright_ranking.CONFIG["RankMin"]:
+        return license
+    else:
+        return "NOLICENSE"
+
+
+def load_header_regions(corpus):
+    """Returns a dictionary of manually classified userfile paths to their
+    manual license and header region lines.
+    """
+    regions = {}
+
+    with open(CONFIG["ManualCheckCSV"], "rt") as manual_check_file:
+        for row in csv.DictReader(manual_check_file):
+            try:
+                regions[row["userfile_path"]] = (
+                    row["license_name"],
+                    header_region.read_header_region(
+                        CONFIG["ProjectDir"] / row["userfile_path"],
+                        copyright_ranking.CONFIG["LinesChecked"]
+                        + max(license.line_count for license in corpus),
+                    ),
+                )
+            except (FileNotFoundError, UnicodeDecodeError):
+                pass
+
+    return regions
+
+
+if __name__ == "__main__":
+    corpus = copyright_ranking.load_license_corpus(
+        copyright_ranking.CONFIG["LicenseSampleFiles"]
+    )
+    regions = load_header_regions(corpus)
+    predictions = collections.defaultdict(dict)
+
+    for algorithm in CONFIG["Algorithms"]:
+        start = time.perf_counter()
+
+        for path, (_, lines) in regions.items():
+            predictions[algorithm][path] = predicted_license(
+                windows.rank_windows(
+                    windows.HeaderWindows(lines),
+                    corpus,
+                    copyright_ranking.CONFIG["LinesChecked"],
+                    [algorithm],
+                )[algorithm]
+            )
+
+        seconds = time.perf_counter() - start
+        correct = sum(
+            predictions[algorithm][path] == manual_license
+            for path, (manual_license, _) in regions.items()
+        )
+
+        print(
+            "{:20} {:8.2f}s {:8.1f} files/s {:6.1%} correct".format(
+                algorithm,
+                seconds,
+                len(regions) / seconds,
+                correct / len(regions),
+            )
+        )
+
+    for algorithm in CONFIG["Algorithms"][1:]:
+        print(
+            "{} agrees with {} on {:6.1%} of files".format(
+                algorithm,
+                CONFIG["Algorithms"][0],
+                sum(
+                    predictions[algorithm][path]
+                    == predictions[CONFIG["Algorithms"][0]][path]
+                    for path in regions
+                ) / len(regions),
+            )
+        )
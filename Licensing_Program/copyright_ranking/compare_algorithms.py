@@ -12,9 +12,27 @@ from bar_graph_manual_licenses import bar_graph_manual_licenses
 from hist_sameness_distributions import hist_sameness_distributions
 from hist_cecill_deltaerror_rank_distribution \
     import hist_cecill_deltaerror_rank_distribution
+from ranking_data import RankingData, read_database_arrays
+from ranking_snapshot import load_snapshot
+
+COLORS = [
+    colors.hsv_to_rgb(triple)
+    for triple in product(
+        [
+             0 / 16,  1 / 16,  2 / 16,  3 / 16,
+             4 / 16,
+             8 / 16,  9 / 16,
+            12 / 16, 13 / 16, 14 / 16,
+        ],
+        [5 / 6],
+        [14 / 16, 11 / 16],
+    )
+]
 
 CONFIG = {
     "Specfem3dDB" : "specfem3d_license_info.db",
+    # arrays read from Specfem3dDB, `None` reads the database every run
+    "SnapshotFile" : "specfem3d_license_info.npz",
     "DatabaseSchema" : """
         CREATE TABLE licenses
             (
@@ -43,35 +61,40 @@ CONFIG = {
                 PRIMARY KEY (file, algorithm, license)
             );
         """,
-    "ColorList" : cycle(
-        colors.hsv_to_rgb(triple)
-        for triple in product(
-            [
-                 0 / 16,  1 / 16,  2 / 16,  3 / 16,
-                 4 / 16,
-                 8 / 16,  9 / 16,
-                12 / 16, 13 / 16, 14 / 16,
-            ],
-            [5 / 6],
-            [14 / 16, 11 / 16],
-        )
-    ),
+    "ColorList" : cycle(COLORS),
 }
 
 
-if __name__ == "__main__":
+def _database_arrays():
     with sql.connect(
         "file:{}?mode=ro".format(CONFIG["Specfem3dDB"]),
         uri=True,
     ) as conn:
+        return read_database_arrays(conn)
 
-        cursor = conn.cursor()
-        bar_graph_manual_licenses(cursor, CONFIG["ColorList"])
 
-        cursor = conn.cursor()
-        hist_sameness_distributions(cursor, CONFIG["ColorList"])
+def load_database_arrays():
+    """Returns the arrays of the database, from the snapshot if enabled.
+    """
+    if CONFIG["SnapshotFile"] is None:
+        return _database_arrays()
+    else:
+        # a WAL mode database keeps its latest changes in its "-wal" file
+        return load_snapshot(
+            CONFIG["SnapshotFile"],
+            [CONFIG["Specfem3dDB"], CONFIG["Specfem3dDB"] + "-wal"],
+            _database_arrays,
+        )
+
+
+if __name__ == "__main__":
+    ranking_data = RankingData(load_database_arrays())
 
-        cursor = conn.cursor()
-        hist_cecill_deltaerror_rank_distribution(cursor, CONFIG["ColorList"])
+    bar_graph_manual_licenses(ranking_data, CONFIG["ColorList"])
+    hist_sameness_distributions(ranking_data, CONFIG["ColorList"])
+    hist_cecill_deltaerror_rank_distribution(
+        ranking_data,
+        CONFIG["ColorList"],
+    )
 
-        plt.show()
+    plt.show()
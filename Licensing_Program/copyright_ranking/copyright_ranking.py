@@ -1,111 +1,209 @@
 #! /usr/bin/env python3
 
 import collections
-import difflib
+import hashlib
 import itertools
 import multiprocessing
+import multiprocessing.pool
 import os
 import pathlib
+import queue
 import sys
 
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+
+import ranking_cache
+import ranking_writers
+import utils.filepaths_gen as filepaths_gen
+import utils.header_region as header_region
+import utils.ranking.coarse as coarse
+import utils.ranking.windows as windows
+
 
 CONFIG = {
     "LinesChecked" : 32,
     "MaxHeaderLines" : 16,
     "RankMin" : 0.2,
+    # keys of `utils.ranking.algorithm_dict`, all scored in a single pass
+    "Algorithms" : ["ratcliff-obershelp"],
+    # licenses kept by the coarse n-gram stage, `None` keeps all licenses
+    "CoarseTopK" : None,
     "LicenseSampleFiles" : list(
         pathlib.Path(".").glob("license_samples/*.header")
     ),
+    # header region rankings of earlier runs, `None` disables the cache
+    "CacheFile" : "copyright_ranking_cache.db",
+    "CacheBatchSize" : 256,
+    # rankings of the most recently used fingerprints kept in the cache; the
+    # rankings of other CONFIG values or corpora are removed
+    "CacheFingerprintsKept" : 4,
+    # queued ranking tasks per process; reading waits for rankings beyond it
+    "MaxRankingTasks" : 4,
+    # "report", or a key of `ranking_writers.ranking_writer_dict` to write
+    # each userfile's ranks as soon as they are known
+    "OutputFormat" : "report",
+    # output path of streamed ranks, `None` writes to stdout; the "sqlite"
+    # format writes into the license database at this path
+    "OutputFile" : None,
+    # `RankMin` of the streamed output formats; 0 writes a rank for every
+    # userfile and license, as the plots of the license database expect
+    "OutputRankMin" : 0.0,
+    # threads scanning project directories concurrently, for network mounted
+    # projects; 0 walks serially, `None` uses the thread pool default
+    "WalkThreads" : 0,
+    # walk concurrently scanned directories in the same, name sorted order
+    # from one run to the next
+    "WalkSorted" : False,
 }
 
+# CONFIG values that change ranking results
+RANKING_CONFIG_KEYS = [
+    "LinesChecked",
+    "MaxHeaderLines",
+    "RankMin",
+    "Algorithms",
+    "CoarseTopK",
+]
+
+# per worker license corpus, its coarse index and the lowest rank kept, set
+# by `init_ranking_worker`
+LICENSE_CORPUS = ()
+COARSE_INDEX = None
+RANK_MIN = CONFIG["RankMin"]
+
+
+def load_license_corpus(sample_paths):
+    """Returns a tuple of `windows.LicenseSample`s read from `sample_paths`.
+    Each sample file is read once; its line count and the exponent used to
+    lessen the rank of short headers are precomputed.
+    """
+    def _license_sample(sample_path):
+        with sample_path.open("rt") as sample_file:
+            text = sample_file.read()
+
+        line_count = len(text.splitlines())
+
+        return windows.LicenseSample(
+            name=sample_path.stem,
+            text=text,
+            line_count=line_count,
+            rank_exponent=max(
+                CONFIG["MaxHeaderLines"] / line_count,
+                1,
+            ) ** (1 / 4),
+        )
+
+    return tuple(_license_sample(path) for path in sample_paths)
+
+
+def init_ranking_worker(sample_paths, rank_min=None):
+    """`multiprocessing.Pool` initializer. Loads the license corpus once for
+    all tasks run by the worker. `rank_min` of `None` keeps the ranks
+    reaching `RankMin`.
+    """
+    global LICENSE_CORPUS, COARSE_INDEX, RANK_MIN
+    LICENSE_CORPUS = load_license_corpus(sample_paths)
+    RANK_MIN = CONFIG["RankMin"] if rank_min is None else rank_min
+
+    if CONFIG["CoarseTopK"] is not None:
+        COARSE_INDEX = coarse.CoarseIndex(LICENSE_CORPUS)
+
 
 def project_path_gen(project_dir):
-    """Generate absolute paths in project_dir of non-ignored files.
+    """Generate absolute paths in project_dir of non-hidden files.
     """
-    for cwd, dirs, files in os.walk(str(project_dir)):
-        for dirname in list(dirs):
-            if dirname.startswith(os.extsep):
-                dirs.remove(dirname)
-
-        for filename in files:
-            if not filename.startswith(os.extsep):
-                filepath = pathlib.Path(os.path.join(cwd, filename)).absolute()
-                try:
-                    with filepath.open("rt") as userfile:
-                        userfile.read()
-                except UnicodeDecodeError:
-                    pass
-                else:
-                    yield filepath
-
-
-def rank_license_text(args):
-    """Returns a list of userfiles and the probability of matching licenses
-    in the license sample directory.
+    project_dir = pathlib.Path(project_dir).absolute()
+
+    if CONFIG["WalkThreads"] == 0:
+        relpaths = filepaths_gen.relpaths_gen(project_dir)
+    else:
+        relpaths = filepaths_gen.parallel_relpaths_gen(
+            project_dir,
+            threads=CONFIG["WalkThreads"],
+            sort=CONFIG["WalkSorted"],
+        )
+
+    for relpath in relpaths:
+        yield project_dir / relpath
+
+
+def header_region_line_count():
+    """Returns the amount of leading lines of a userfile ranked, enough for
+    the longest license sample starting at the last line checked.
     """
-    userfile_path, project_dir = args
+    return (
+        CONFIG["LinesChecked"]
+        + max(license.line_count for license in LICENSE_CORPUS)
+    )
 
-    def _license_rank_gen():
-        with userfile_path.open("rt") as userfile:
-            for license_path, userfile_iter in zip(
-                CONFIG["LicenseSampleFiles"],
-                itertools.tee(
-                    userfile,
-                    len(CONFIG["LicenseSampleFiles"]) * CONFIG["LinesChecked"]
-                )
-            ):
-                license = license_path.open("rt").read()
-                license_len = len(license.splitlines())
-
-                diff_rank, lineno = max(
-                    (
-                        (
-                            difflib.SequenceMatcher(
-                                a=license,
-                                b="".join(
-                                    itertools.islice(
-                                        userfile_iter,
-                                        lineno,
-                                        lineno + license_len,
-                                    )
-                                ),
-                            ).ratio(),
-                            lineno + 1,  # line numbers one-based
-                        )
-                        for lineno in range(CONFIG["LinesChecked"])
-                    ),
-                    key=lambda pair: pair[0],
-                )
 
-                # formula to lessen rank of short headers
-                rank = diff_rank ** (
-                    max(
-                        CONFIG["MaxHeaderLines"]
-                            / len(license_path.open("rt").read().splitlines()),
-                        1,
-                    ) ** (1 / 4))
+def read_userfile_region(args):
+    """Returns the suffix and project relative path of a userfile, the hex
+    digest of its header region and the region's lines. Returns `None` if the
+    header region is not standard text.
+    """
+    userfile_path, project_dir = args
 
-                yield (rank, diff_rank, lineno, license_path.stem)
+    try:
+        userfile_lines = header_region.read_header_region(
+            userfile_path,
+            header_region_line_count(),
+        )
+    except UnicodeDecodeError:
+        return None
 
     return (
         userfile_path.suffix,
-        (
-            str(userfile_path.relative_to(project_dir)),
-            sorted(_license_rank_gen(), reverse=True),
-        )
+        str(userfile_path.relative_to(project_dir)),
+        hashlib.sha1("".join(userfile_lines).encode()).hexdigest(),
+        userfile_lines,
     )
 
 
-def print_ranking():
-    pool = multiprocessing.Pool()
-    result = collections.defaultdict(list)
+def rank_header_region(args):
+    """Returns the digest of a header region, the probability of the region
+    matching licenses in the license sample directory, per ranking algorithm,
+    and the counts of compared and pruned license/window pairs.
+    """
+    digest, userfile_lines = args
+    userfile_windows = windows.HeaderWindows(userfile_lines)
 
-    for suffix, (path, ranks) in pool.imap_unordered(
-        rank_license_text,
-        zip(project_path_gen(sys.argv[1]), itertools.repeat(sys.argv[1]))
-    ):
-        result[suffix] += [(path, ranks)]
+    if COARSE_INDEX is not None:
+        corpus = COARSE_INDEX.top_licenses(
+            userfile_windows.text,
+            CONFIG["CoarseTopK"],
+        )
+    else:
+        corpus = LICENSE_CORPUS
 
+    pair_counts = collections.Counter()
+    algorithm_ranks = windows.rank_windows(
+        userfile_windows,
+        corpus,
+        CONFIG["LinesChecked"],
+        CONFIG["Algorithms"],
+        RANK_MIN,
+        pair_counts,
+    )
+
+    return (
+        digest,
+        [
+            (
+                algorithm,
+                sorted(algorithm_ranks[algorithm], reverse=True),
+            )
+            for algorithm in CONFIG["Algorithms"]
+        ],
+        pair_counts,
+    )
+
+
+def print_report(result, regions):
+    """Prints the ranks in `result`, a dictionary of userfile suffixes to
+    `(path, algorithm_ranks)` pairs, and the header regions of `regions`
+    shared by more than one userfile.
+    """
     print("{")
     for suffix in sorted(result.keys()):
         empty_ranks = False
@@ -113,25 +211,25 @@ def print_ranking():
         print("  {!r} :".format(suffix))
         print("    [")
 
-        for path, ranks in sorted(result[suffix], key=lambda pair: pair[::-1]):
-            ranks = [
-                (rank, diff_rank, lineno, license)
-                for rank, diff_rank, lineno, license in ranks
-                if rank >= CONFIG["RankMin"] or True
-            ]
-
-            if ranks:
+        for path, algorithm_ranks in sorted(
+            result[suffix], key=lambda pair: pair[::-1]
+        ):
+            if any(ranks for _, ranks in algorithm_ranks):
                 if empty_ranks:
                     print("\n\n\n")
                     empty_ranks = False
 
                 print("      {!r} : [".format(path))
 
-                for rank, diff_rank, lineno, license in ranks:
-                    print(
-                        "        {:6.1%} ({:6.1%}) : {:12} line: {:2}".format(
-                            rank, diff_rank, license, lineno)
-                    )
+                for algorithm, ranks in algorithm_ranks:
+                    if len(algorithm_ranks) > 1:
+                        print("        # {}".format(algorithm))
+
+                    for rank, diff_rank, lineno, license in ranks:
+                        print(
+                            "        {:6.1%} ({:6.1%}) : {:12} line: {:2}"
+                            .format(rank, diff_rank, license, lineno)
+                        )
 
                 print("      ],")
 
@@ -144,6 +242,228 @@ def print_ranking():
 
     print("}")
 
+    print("# header regions shared by more than one userfile")
+    print("{")
+    for digest, userfiles in sorted(
+        regions.items(),
+        key=lambda pair: (-len(pair[1]), pair[0]),
+    ):
+        if len(userfiles) > 1:
+            print("  {!r} : {},  # {}".format(
+                digest, len(userfiles), userfiles[0][1]))
+    print("}")
+
+
+def print_ranking():
+    if CONFIG["OutputFormat"] == "report":
+        writer_class = None
+    elif CONFIG["OutputFormat"] in ranking_writers.ranking_writer_dict:
+        writer_class = ranking_writers.ranking_writer_dict[
+            CONFIG["OutputFormat"]
+        ]
+    else:
+        raise ValueError(
+            "OutputFormat must be \"report\" or one of {}, not {!r}".format(
+                sorted(ranking_writers.ranking_writer_dict.keys()),
+                CONFIG["OutputFormat"],
+            )
+        )
+
+    if (
+        writer_class is ranking_writers.CsvRankingWriter
+        and not set(ranking_writers.CSV_ALGORITHM_COLUMNS) <= set(
+            CONFIG["Algorithms"]
+        )
+    ):
+        raise ValueError(
+            "csv output needs Algorithms {}".format(
+                sorted(ranking_writers.CSV_ALGORITHM_COLUMNS.keys())
+            )
+        )
+
+    # the report lists the likely licenses, the streamed formats feed
+    # analyses of the whole rank distribution
+    if writer_class is None:
+        rank_min = CONFIG["RankMin"]
+    else:
+        rank_min = CONFIG["OutputRankMin"]
+
+    # header regions are read by threads of this process, with its own copy
+    # of the corpus, so the ranking pool only ever holds ranking tasks
+    init_ranking_worker(CONFIG["LicenseSampleFiles"], rank_min)
+    processes = os.cpu_count() or 1
+    pool = multiprocessing.Pool(
+        processes,
+        initializer=init_ranking_worker,
+        initargs=(CONFIG["LicenseSampleFiles"], rank_min),
+    )
+    read_pool = multiprocessing.pool.ThreadPool(processes)
+    result = collections.defaultdict(list)
+    pair_counts = collections.Counter()
+
+    # header region digest to the userfiles sharing it, for the report
+    regions = collections.OrderedDict()
+    # header region digest to its algorithm ranks, once known
+    ranked = {}
+    # header region digest to the userfiles waiting for its ranks
+    waiting = {}
+    # results and errors of ranking tasks, put by the pool's result thread
+    rankings = queue.Queue()
+    file_count = 0
+    cache_hits = 0
+
+    cache_conn = None
+    writer = None
+    new_rankings = []
+
+    def _write_ranks(suffix, path, digest, algorithm_ranks):
+        if writer is None:
+            result[suffix] += [(path, algorithm_ranks)]
+        else:
+            writer.write(path, digest, algorithm_ranks)
+
+    def _take_ranking(block):
+        """Writes the userfiles waiting for the next finished ranking. Raises
+        `queue.Empty` if none has finished and `block` is false.
+        """
+        ranking = rankings.get(block)
+
+        if isinstance(ranking, BaseException):
+            raise ranking
+
+        digest, algorithm_ranks, region_pair_counts = ranking
+        pair_counts.update(region_pair_counts)
+        ranked[digest] = algorithm_ranks
+
+        for suffix, path in waiting.pop(digest):
+            _write_ranks(suffix, path, digest, algorithm_ranks)
+
+        if cache_conn is not None:
+            new_rankings.append((digest, algorithm_ranks))
+
+            if len(new_rankings) >= CONFIG["CacheBatchSize"]:
+                ranking_cache.store_rankings(
+                    cache_conn, fingerprint, new_rankings
+                )
+                del new_rankings[:]
+
+    # an interrupted or failed run still keeps the ranks written and the
+    # rankings finished so far
+    try:
+        if CONFIG["CacheFile"] is not None:
+            fingerprint = ranking_cache.ranking_fingerprint(
+                LICENSE_CORPUS,
+                dict(CONFIG, RankMin=rank_min),
+                RANKING_CONFIG_KEYS,
+            )
+            cache_conn = ranking_cache.open_ranking_cache(
+                CONFIG["CacheFile"],
+                fingerprint,
+            )
+            ranking_cache.prune_rankings(
+                cache_conn,
+                CONFIG["CacheFingerprintsKept"],
+            )
+
+        if writer_class is not None:
+            writer = writer_class(CONFIG["OutputFile"])
+
+        for region in read_pool.imap_unordered(
+            read_userfile_region,
+            zip(project_path_gen(sys.argv[1]), itertools.repeat(sys.argv[1])),
+            chunksize=16,
+        ):
+            try:
+                while True:
+                    _take_ranking(False)
+            except queue.Empty:
+                pass
+
+            if region is None:
+                continue
+
+            suffix, path, digest, userfile_lines = region
+            file_count += 1
+
+            if writer is None:
+                regions.setdefault(digest, []).append((suffix, path))
+
+            if digest in ranked:
+                _write_ranks(suffix, path, digest, ranked[digest])
+                continue
+
+            if digest in waiting:
+                waiting[digest].append((suffix, path))
+                continue
+
+            if cache_conn is not None:
+                cached = ranking_cache.cached_rankings(
+                    cache_conn, fingerprint, [digest]
+                )
+            else:
+                cached = {}
+
+            if digest in cached:
+                cache_hits += 1
+                ranked[digest] = cached[digest]
+                _write_ranks(suffix, path, digest, cached[digest])
+                continue
+
+            # bound the header regions held by queued ranking tasks
+            while len(waiting) >= CONFIG["MaxRankingTasks"] * processes:
+                _take_ranking(True)
+
+            # rank each distinct, uncached header region once; its lines are
+            # held by the ranking task only, never kept here
+            waiting[digest] = [(suffix, path)]
+            pool.apply_async(
+                rank_header_region,
+                ((digest, userfile_lines),),
+                callback=rankings.put,
+                error_callback=rankings.put,
+            )
+
+        while waiting:
+            _take_ranking(True)
+
+    finally:
+        read_pool.terminate()
+        pool.terminate()
+
+        if writer is not None:
+            writer.close()
+
+        if cache_conn is not None:
+            ranking_cache.store_rankings(
+                cache_conn, fingerprint, new_rankings
+            )
+            cache_conn.close()
+
+    if writer is None:
+        print_report(result, regions)
+
+    print(
+        "ranked {} distinct header regions of {} files".format(
+            len(ranked),
+            file_count,
+        ),
+        file=sys.stderr,
+    )
+    print(
+        "ranking cache: {} hits, {} misses".format(
+            cache_hits,
+            len(ranked) - cache_hits,
+        ),
+        file=sys.stderr,
+    )
+    print(
+        "pruned {} of {} license/window pairs".format(
+            pair_counts["pruned"],
+            pair_counts["pruned"] + pair_counts["compared"],
+        ),
+        file=sys.stderr,
+    )
+
 
 if __name__ == "__main__":
     sys.argv[1] = pathlib.Path(sys.argv[1]).absolute()
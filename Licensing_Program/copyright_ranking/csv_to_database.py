@@ -1,136 +1,130 @@
 #! /usr/bin/env python3
 
 import csv
-import sqlite3 as sql
+import itertools
+
+import license_database
+import ranking_writers
 
 
 CONFIG = {
+    # `None` skips a CSV file, so new results can be merged into an existing
+    # database on their own
     "HeaderLinesCSV" : "header_info.csv",
     "CalculatedRankingsCSV" : "specfem3d_info.csv",
     "ManualCheckCSV" : "specfem3d_file_licenses.csv",
     "Specfem3dDB" : "specfem3d_license_info.db",
+    "BatchSize" : 8192,
 }
 
-with sql.connect(CONFIG["Specfem3dDB"]) as conn:
-    conn.execute(
-        "CREATE TABLE licenses"
-        " ("
-            " id INTEGER PRIMARY KEY,"
-            " name TEXT NOT NULL UNIQUE,"
-            " line_amount INTEGER DEFAULT NULL"
-        " )"
-    )
-
-    conn.execute(
-        "CREATE TABLE project_files"
-        " ("
-            " id INTEGER PRIMARY KEY,"
-            " path TEXT NOT NULL UNIQUE,"
-            " manual_license REFERENCES licenses (id)"
-        " )"
-    )
-
-    conn.execute(
-        "CREATE TABLE ranking_algorithms"
-        " ("
-            " id INTEGER PRIMARY KEY,"
-            " name TEXT NOT NULL UNIQUE"
-        " )"
-    )
-
-    conn.execute(
-        "CREATE TABLE calculated_license_rank"
-        " ("
-            " file REFERENCES project_files (id),"
-            " algorithm REFERENCES ranking_algorithms (id),"
-            " license REFERENCES licenses (id),"
-            " ranking REAL NOT NULL,"
-            " position_lineno INTEGER NOT NULL,"
-            " PRIMARY KEY (file, algorithm, license)"
-        " )"
-    )
-
-    with open(CONFIG["HeaderLinesCSV"], "rt") as header_file:
-        header_csv = csv.DictReader(header_file)
-
-        conn.executemany(
-            "INSERT INTO licenses(name, line_amount) VALUES (?, ?)",
-            ((row["header_name"], row["total_lines"]) for row in header_csv),
-        )
 
-    with open(CONFIG["ManualCheckCSV"], "rt") as manual_check_file:
-        manual_csv = csv.DictReader(manual_check_file)
+def _batches(iterable, batch_size):
+    iterator = iter(iterable)
 
-        for row in manual_csv:
-            conn.execute(
-                "INSERT OR IGNORE INTO licenses (name, line_amount)"
-                " VALUES (?, NULL)",
-                [row["license_name"]],
-            )
+    for batch in iter(lambda: list(itertools.islice(iterator, batch_size)),
+                      []):
+        yield batch
 
-            (license_id,) = conn.execute(
-                "SELECT id FROM licenses WHERE name = ?",
-                [row["license_name"]]
-            ).fetchone()
-
-            conn.execute(
-                "INSERT INTO project_files (path, manual_license)"
-                " VALUES (?, ?)",
-                [
-                    row["userfile_path"],
-                    license_id,
-                ],
-            )
 
-    conn.executemany(
-        "INSERT INTO ranking_algorithms (name) VALUES (?)",
-        [["ratcliff-obershelp"], ["levenshtein"]],
-    )
-
-    (ratcliff_obershelp_id,) = conn.execute(
-        "SELECT id FROM ranking_algorithms WHERE name == 'ratcliff-obershelp'"
-    ).fetchone()
-
-    (levenshtein_id,) = conn.execute(
-        "SELECT id FROM ranking_algorithms WHERE name == 'levenshtein'"
-    ).fetchone()
-
-    with open(CONFIG["CalculatedRankingsCSV"], "rt") as ranking_file:
-        ranking_csv = csv.DictReader(ranking_file)
-
-        for row in ranking_csv:
-            (license_id,) = conn.execute(
-                "SELECT id FROM licenses WHERE name == ?",
-                [row["license_name"]],
-            ).fetchone()
-
-            (userfile_id,) = conn.execute(
-                "SELECT id FROM project_files WHERE path == ?",
-                [row["userfile_path"]],
-            ).fetchone()
-
-            conn.execute(
-                "INSERT INTO calculated_license_rank"
-                " (file, algorithm, license, ranking, position_lineno) VALUES"
-                " (:file, :algorithm, :license, :ranking, :position_lineno)",
-                {
-                    "file" : userfile_id,
-                    "algorithm" : ratcliff_obershelp_id,
-                    "license" : license_id,
-                    "ranking" : row["diff_ratio"],
-                    "position_lineno" : row["diff_lineno"],
-                }
+def load_header_lines(conn, csv_path):
+    """Inserts or updates the line amount of each license header.
+    """
+    with open(csv_path, "rt") as header_file:
+        with conn:
+            conn.executemany(
+                "INSERT INTO licenses (name, line_amount) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE"
+                " SET line_amount = excluded.line_amount",
+                (
+                    (row["header_name"], row["total_lines"])
+                    for row in csv.DictReader(header_file)
+                ),
             )
 
-            conn.execute(
-                "INSERT INTO calculated_license_rank"
-                " (file, algorithm, license, ranking, position_lineno) VALUES"
-                " (:file, :algorithm, :license, :ranking, :position_lineno)",
-                {
-                    "file" : userfile_id,
-                    "algorithm" : levenshtein_id,
-                    "license" : license_id,
-                    "ranking" : row["levenshtein_ratio"],
-                    "position_lineno" : row["levenshtein_lineno"],
-                }
-            )
+
+def load_manual_licenses(conn, csv_path, batch_size):
+    """Inserts each userfile or updates its manually checked license.
+    """
+    license_ids = license_database.IdMap(conn, "licenses")
+
+    with open(csv_path, "rt") as manual_check_file:
+        for batch in _batches(csv.DictReader(manual_check_file), batch_size):
+            with conn:
+                conn.executemany(
+                    "INSERT INTO project_files (path, manual_license)"
+                    " VALUES (?, ?)"
+                    " ON CONFLICT (path) DO UPDATE"
+                    " SET manual_license = excluded.manual_license",
+                    [
+                        (
+                            row["userfile_path"],
+                            license_ids[row["license_name"]],
+                        )
+                        for row in batch
+                    ],
+                )
+
+
+def load_calculated_rankings(conn, csv_path, batch_size):
+    """Inserts or updates the rank of each userfile and license, per ranking
+    algorithm, and the best ranks of the userfiles.
+    """
+    file_ids = license_database.IdMap(conn, "project_files", "path")
+    license_ids = license_database.IdMap(conn, "licenses")
+    algorithm_ids = license_database.IdMap(conn, "ranking_algorithms")
+
+    algorithm_columns = [
+        (algorithm_ids[algorithm], prefix + "_ratio", prefix + "_lineno")
+        for algorithm, prefix in ranking_writers.CSV_ALGORITHM_COLUMNS.items()
+    ]
+
+    with open(csv_path, "rt") as ranking_file:
+        for batch in _batches(csv.DictReader(ranking_file), batch_size):
+            with conn:
+                conn.executemany(
+                    license_database.UPSERT_CALCULATED_LICENSE_RANK,
+                    [
+                        (
+                            file_ids[row["userfile_path"]],
+                            algorithm_id,
+                            license_ids[row["license_name"]],
+                            row[ratio_column],
+                            row[lineno_column],
+                        )
+                        for row in batch
+                        for algorithm_id, ratio_column, lineno_column
+                        in algorithm_columns
+                    ],
+                )
+                license_database.update_best_license_ranks(
+                    conn,
+                    (file_ids[row["userfile_path"]] for row in batch),
+                )
+
+
+if __name__ == "__main__":
+    conn = license_database.connect(CONFIG["Specfem3dDB"])
+
+    # a failed load is simply run again
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -65536")
+
+    if CONFIG["HeaderLinesCSV"] is not None:
+        load_header_lines(conn, CONFIG["HeaderLinesCSV"])
+
+    if CONFIG["ManualCheckCSV"] is not None:
+        load_manual_licenses(
+            conn,
+            CONFIG["ManualCheckCSV"],
+            CONFIG["BatchSize"],
+        )
+
+    if CONFIG["CalculatedRankingsCSV"] is not None:
+        load_calculated_rankings(
+            conn,
+            CONFIG["CalculatedRankingsCSV"],
+            CONFIG["BatchSize"],
+        )
+
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.close()
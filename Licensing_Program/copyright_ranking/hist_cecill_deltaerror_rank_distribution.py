@@ -4,93 +4,30 @@ from collections import defaultdict
 from itertools import islice
 
 import matplotlib.pyplot as plt
+import numpy
 
+from ranking_data import group_by
 
-def hist_cecill_deltaerror_rank_distribution(cursor, colorlist):
-    cursor = cursor.execute("""
-            SELECT
-              max_ranking.ranking
-              - cecill_ranking.ranking,
-              ranking_algorithms.name
-            FROM
-                  (
-                    SELECT
-                      calculated_license_rank.file,
-                      calculated_license_rank.algorithm,
-                      calculated_license_rank.ranking
-                    FROM
-                          calculated_license_rank
-                      JOIN
-                          project_files
-                        ON
-                          calculated_license_rank.file = project_files.id
-                      JOIN
-                          ranking_algorithms
-                        ON
-                          calculated_license_rank.algorithm
-                          = ranking_algorithms.id
-                      JOIN
-                          licenses AS manu_licenses
-                        ON
-                          project_files.manual_license = manu_licenses.id
-                      JOIN
-                          licenses AS calc_licenses
-                        ON
-                          calculated_license_rank.license = calc_licenses.id
-                    WHERE
-                      manu_licenses.name = 'cecill-c-1'
-                    GROUP BY
-                        calculated_license_rank.file,
-                        calculated_license_rank.algorithm
-                      HAVING
-                        MAX(calculated_license_rank.ranking)
-                  ) AS max_ranking
-              JOIN
-                  (
-                    SELECT
-                      calculated_license_rank.file,
-                      calculated_license_rank.algorithm,
-                      calculated_license_rank.ranking
-                    FROM
-                          calculated_license_rank
-                      JOIN
-                          project_files
-                        ON
-                          calculated_license_rank.file = project_files.id
-                      JOIN
-                          ranking_algorithms
-                        ON
-                          calculated_license_rank.algorithm
-                          = ranking_algorithms.id
-                      JOIN
-                          licenses AS manu_licenses
-                        ON
-                          project_files.manual_license = manu_licenses.id
-                      JOIN
-                          licenses AS calc_licenses
-                        ON
-                          calculated_license_rank.license = calc_licenses.id
-                    WHERE
-                        manu_licenses.name = 'cecill-c-1'
-                      AND
-                        calc_licenses.name = 'cecill-c-1'
-                  ) AS cecill_ranking
-                ON
-                    max_ranking.file
-                    = cecill_ranking.file
-                  AND
-                    max_ranking.algorithm
-                    = cecill_ranking.algorithm
-              JOIN
-                  ranking_algorithms
-                ON
-                  max_ranking.algorithm = ranking_algorithms.id
-    """)
 
-    data = defaultdict(list)
+def hist_cecill_deltaerror_rank_distribution(ranking_data, colorlist):
+    best_ranks = ranking_data.best_ranks()
+    best_ranks = best_ranks[
+        best_ranks["manual_license"] == ranking_data.license_ids["cecill-c-1"]
+    ]
 
-    for difference, algorithm in cursor:
-        data[algorithm].append(difference)
+    differences = (
+        best_ranks["ranking"]
+        - ranking_data.license_ranks(best_ranks, "cecill-c-1")
+    )
+    is_ranked = ~numpy.isnan(differences)
+
+    data = {
+        ranking_data.algorithm_names[algorithm] : algorithm_differences
+        for (algorithm,), algorithm_differences in group_by(
+            differences[is_ranked],
+            best_ranks["algorithm"][is_ranked],
+        ).items()
+    }
 
     cecill_deltaerror_rank_fig = plt.figure()
     cecill_deltaerror_rank_fig.suptitle(
@@ -120,3 +57,5 @@ def hist_cecill_deltaerror_rank_distribution(cursor, colorlist):
     )
     cecill_deltaerror_rank_ax.legend(loc="best")
     cecill_deltaerror_rank_ax.grid(True)
+
+    return cecill_deltaerror_rank_fig
@@ -5,8 +5,10 @@ from itertools import islice
 
 import matplotlib.pyplot as plt
 
+from ranking_data import group_by
 
-def hist_sameness_distributions(cursor, colorlist):
+
+def hist_sameness_distributions(ranking_data, colorlist):
     rank_dist_fig = plt.figure()
     rank_dist_fig.suptitle(
         "Sameness Distribution"
@@ -19,42 +21,31 @@ def hist_sameness_distributions(cursor, colorlist):
     rank_dist_fig.add_subplot()
     rank_dist_ax = rank_dist_fig.gca()
 
-    cursor = cursor.execute("""
-        SELECT
-          calculated_license_rank.license = project_files.manual_license,
-          ranking_algorithms.name,
-          manu_licenses.name,
-          calculated_license_rank.ranking
-        FROM
-              calculated_license_rank
-          JOIN
-              project_files
-            ON
-              calculated_license_rank.file = project_files.id
-          JOIN
-              ranking_algorithms
-            ON
-              calculated_license_rank.algorithm = ranking_algorithms.id
-          JOIN
-              licenses AS manu_licenses
-            ON
-              project_files.manual_license = manu_licenses.id
-        GROUP BY
-            calculated_license_rank.file,
-            calculated_license_rank.algorithm
-          HAVING
-            MAX(calculated_license_rank.ranking)
-    """)
-
-    data = defaultdict(list)
-    data_per_license = defaultdict(lambda: defaultdict(list))
-
-    for match, algorithm, manual_license, ranking in cursor:
-        data[(bool(match), algorithm)].append(ranking)
-
-        data_per_license[manual_license][
-            (bool(match), algorithm)
-        ].append(ranking)
+    best_ranks = ranking_data.best_ranks()
+    best_ranks = best_ranks[best_ranks["manual_license"] != -1]
+    matches = best_ranks["license"] == best_ranks["manual_license"]
+
+    data = {
+        (bool(match), ranking_data.algorithm_names[algorithm]) :
+            ranks["ranking"]
+        for (match, algorithm), ranks in group_by(
+            best_ranks,
+            matches,
+            best_ranks["algorithm"],
+        ).items()
+    }
+
+    data_per_license = defaultdict(dict)
+
+    for (manual_license, match, algorithm), ranks in group_by(
+        best_ranks,
+        best_ranks["manual_license"],
+        matches,
+        best_ranks["algorithm"],
+    ).items():
+        data_per_license[ranking_data.license_names[manual_license]][
+            (bool(match), ranking_data.algorithm_names[algorithm])
+        ] = ranks["ranking"]
 
     data_keys, data_values = zip(*sorted(data.items()))
 
@@ -102,7 +93,10 @@ def hist_sameness_distributions(cursor, colorlist):
         )
 
         rank_dist_license_fig.add_subplot(
-            math.floor(len(data_per_license) ** (1 / 2)),
+            math.ceil(
+                len(data_per_license)
+                / math.ceil(len(data_per_license) ** (1 / 2))
+            ),
             math.ceil(len(data_per_license) ** (1 / 2)),
             index,
         )
@@ -134,3 +128,5 @@ def hist_sameness_distributions(cursor, colorlist):
         ax.grid(True)
         ax.legend(loc='best', fontsize="small")
         ax.set_title("{}".format(license))
+
+    return rank_dist_fig, rank_dist_license_fig
@@ -0,0 +1,151 @@
+import sqlite3 as sql
+
+UPSERT_CALCULATED_LICENSE_RANK = (
+    "INSERT INTO calculated_license_rank"
+    " (file, algorithm, license, ranking, position_lineno)"
+    " VALUES (?, ?, ?, ?, ?)"
+    " ON CONFLICT (file, algorithm, license) DO UPDATE"
+    " SET ranking = excluded.ranking,"
+    " position_lineno = excluded.position_lineno"
+)
+
+# the bare columns of a query with a single `MAX` are those of its best row
+_INSERT_BEST_LICENSE_RANK = (
+    "INSERT OR REPLACE INTO best_license_rank"
+    " (file, algorithm, license, ranking, position_lineno)"
+    " SELECT file, algorithm, license, MAX(ranking), position_lineno"
+    " FROM calculated_license_rank"
+)
+
+
+def connect(path):
+    """Returns a connection to the license database at `path` in WAL mode,
+    with every table created if missing.
+    """
+    conn = sql.connect(str(path))
+    conn.execute("PRAGMA journal_mode = WAL")
+    create_tables(conn)
+
+    return conn
+
+
+def create_tables(conn):
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS licenses"
+            " ("
+                " id INTEGER PRIMARY KEY,"
+                " name TEXT NOT NULL UNIQUE,"
+                " line_amount INTEGER DEFAULT NULL"
+            " )"
+        )
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS project_files"
+            " ("
+                " id INTEGER PRIMARY KEY,"
+                " path TEXT NOT NULL UNIQUE,"
+                " manual_license REFERENCES licenses (id)"
+            " )"
+        )
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS ranking_algorithms"
+            " ("
+                " id INTEGER PRIMARY KEY,"
+                " name TEXT NOT NULL UNIQUE"
+            " )"
+        )
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS calculated_license_rank"
+            " ("
+                " file REFERENCES project_files (id),"
+                " algorithm REFERENCES ranking_algorithms (id),"
+                " license REFERENCES licenses (id),"
+                " ranking REAL NOT NULL,"
+                " position_lineno INTEGER NOT NULL,"
+                " PRIMARY KEY (file, algorithm, license)"
+            " )"
+        )
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS calculated_license_rank_best"
+            " ON calculated_license_rank (algorithm, file, ranking)"
+        )
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS project_files_manual_license"
+            " ON project_files (manual_license)"
+        )
+
+        # best ranked license per file and algorithm, kept in sync with
+        # `calculated_license_rank` by `update_best_license_ranks`
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS best_license_rank"
+            " ("
+                " file REFERENCES project_files (id),"
+                " algorithm REFERENCES ranking_algorithms (id),"
+                " license REFERENCES licenses (id),"
+                " ranking REAL NOT NULL,"
+                " position_lineno INTEGER NOT NULL,"
+                " PRIMARY KEY (file, algorithm)"
+            " )"
+        )
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS best_license_rank_algorithm_ranking"
+            " ON best_license_rank (algorithm, ranking)"
+        )
+
+        # databases made before `best_license_rank` existed
+        (needs_best_ranks,) = conn.execute(
+            "SELECT"
+            " NOT EXISTS (SELECT 1 FROM best_license_rank)"
+            " AND EXISTS (SELECT 1 FROM calculated_license_rank)"
+        ).fetchone()
+
+        if needs_best_ranks:
+            conn.execute(
+                _INSERT_BEST_LICENSE_RANK + " GROUP BY file, algorithm"
+            )
+
+
+def update_best_license_ranks(conn, file_ids):
+    """Recomputes the `best_license_rank` rows of the files of `file_ids`
+    from their calculated ranks. Called in the transaction that changed
+    them.
+    """
+    conn.executemany(
+        _INSERT_BEST_LICENSE_RANK + " WHERE file = ? GROUP BY file, algorithm",
+        ((file_id,) for file_id in set(file_ids)),
+    )
+
+
+class IdMap:
+    """In memory map of the `name_column` values of a table to their ids.
+    Existing rows are read once; a missing name is inserted the first time it
+    is asked for.
+    """
+    def __init__(self, conn, table, name_column="name"):
+        self.conn = conn
+        self.table = table
+        self.name_column = name_column
+        self.ids = {
+            name : row_id
+            for row_id, name in conn.execute(
+                "SELECT id, {} FROM {}".format(name_column, table)
+            )
+        }
+
+    def __getitem__(self, name):
+        try:
+            return self.ids[name]
+        except KeyError:
+            row_id = self.ids[name] = self.conn.execute(
+                "INSERT INTO {} ({}) VALUES (?)".format(
+                    self.table, self.name_column
+                ),
+                [name],
+            ).lastrowid
+            return row_id
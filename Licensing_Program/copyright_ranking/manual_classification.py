@@ -1,101 +1,278 @@
 #! /usr/bin/env python3
 
+import collections
 import csv
+import hashlib
 import itertools
-import os
 import pathlib
+import posixpath
+import queue
+import re
+import sys
+import threading
+
+# after the script directory, whose `copyright_ranking` module would otherwise
+# be shadowed by the directory of the same name
+sys.path.append(str(pathlib.Path(__file__).absolute().parent.parent))
+
+import copyright_ranking
+import utils.filepaths_gen as filepaths_gen
+import utils.header_region as header_region
+import utils.ranking.line_hash as line_hash
 
 CONFIG = {
     "ProjectDir" : pathlib.Path("specfem3d").absolute(),
     "OutputFile" : "specfem3d_file_licenses.csv",
     "PreviewLines" : 32,
     "ANSIColors" : True,
+    # ask once for every cluster of files with near-identical header regions
+    "ClusterHeaders" : False,
+    "HeaderRegionLines" : 48,
+    "ClusterMembersShown" : 8,
+    # files line counted and ranked in the background ahead of the prompt
+    "PrefetchFiles" : 8,
+    # offer the best ranked license sample as a one key answer
+    "PredictLicense" : True,
 }
 
+_DIGITS_RE = re.compile(r"\d+")
+
+# a line comment, or the start or inside of a block comment, in the
+# languages of `line_hash`; Fortran `c` comments only start in column 1 and
+# C preprocessor directives (`#include`) are code
+_COMMENT_LINE_RE = re.compile(
+    r"^(?:[cC](?=\s|$)|\s*(?://|/\*|\*|[!;%]|--"
+    r"|#(?!\s*(?:include|define|undef|if|ifdef|ifndef|elif|else|endif"
+    r"|pragma|error)\b)))"
+)
+
+# `lines` are the lines of the first file of `cluster`, `prediction` is a
+# `(license_name, rank)` pair or `None`
+Prefetch = collections.namedtuple(
+    "Prefetch",
+    ["cluster", "lines", "prediction"],
+)
+
 
 def project_path_gen(project_dir):
-    """Generate absolute paths in project_dir of non-ignored files.
+    """Generate absolute paths in project_dir of non-hidden files whose
+    header region is text, the files of each directory ordered by suffix.
     """
-    for cwd, dirs, files in os.walk(str(project_dir)):
-        def _sortkey(name):
-            return pathlib.Path(name).suffix
-
-        files.sort(key=_sortkey)
-
-        for dirname in list(dirs):
-            if dirname.startswith(os.extsep):
-                dirs.remove(dirname)
-
-        for filename in files:
-            if not filename.startswith(os.extsep):
-                filepath = pathlib.Path(os.path.join(cwd, filename)).absolute()
-                try:
-                    with filepath.open("rt") as userfile:
-                        userfile.read()
-                except UnicodeDecodeError:
-                    pass
-                else:
-                    yield filepath
-
-
-def _islice_groups(iterable, glength):
-    iterable, iter_copy = itertools.tee(iterable)
-    count = 0
-    group = list(itertools.islice(iter_copy, glength))
-
-    while group:
-        yield group
-        count += glength
-        iterable, iter_copy = itertools.tee(iterable)
-        group = list(
-            itertools.islice(iter_copy, count, count + glength)
-        )
+    def _sortkey(relpath):
+        return posixpath.splitext(relpath)[1]
+
+    # the walk generates the files of a directory together
+    for _, relpaths in itertools.groupby(
+        filepaths_gen.relpaths_gen(project_dir),
+        key=posixpath.dirname,
+    ):
+        for relpath in sorted(relpaths, key=_sortkey):
+            filepath = project_dir / relpath
+            try:
+                header_region.read_header_region(
+                    filepath,
+                    CONFIG["HeaderRegionLines"],
+                )
+            except UnicodeDecodeError:
+                pass
+            else:
+                yield filepath
 
 
-def get_manual_license_classification(filepath):
-    with filepath.open("rt") as file:
-        for lines in _islice_groups(file, CONFIG["PreviewLines"]):
-            print()
-            for line in lines:
-                print(line, end="")
+def header_block(lines):
+    """Returns the leading lines of a header region that are comments or
+    blank, up to its first line of code, so the code after a header isn't
+    taken for part of it.
+    """
+    block = []
+    in_block_comment = False
+
+    for line in lines:
+        if not (in_block_comment or not line.strip()
+                or _COMMENT_LINE_RE.match(line)):
+            break
+
+        block.append(line)
+
+        start = line.rfind("/*")
+        if start != -1:
+            in_block_comment = line.find("*/", start + 2) == -1
+        elif in_block_comment:
+            in_block_comment = "*/" not in line
+
+    return block
+
+
+def header_cluster_key(lines):
+    """Returns the hex digest of the `header_block` of a header region's
+    lines without comment tokens, case, whitespace, blank lines or digits,
+    so headers differing only in comment style or copyright years share a
+    key whatever code follows them. Returns `None` for a region without a
+    header block.
+    """
+    sha1 = hashlib.sha1()
+    has_text = False
+
+    for line in header_block(lines):
+        text = _DIGITS_RE.sub("0", line_hash.normalize_line(line))
 
-            if len(lines) < CONFIG["PreviewLines"]:
-                break
+        if text:
+            sha1.update(text.encode() + b"\n")
+            has_text = True
 
-            response = input(
-                ("\x1b[33m" if CONFIG["ANSIColors"] else "")
-                + "\n<><><><><><><><><><><><><><><><><>"
-                + "\n<license>/(c)ontinue/(n)one/(q)uit"
-                + "\n "
-                + ("\x1b[0m" if CONFIG["ANSIColors"] else "")
+    return sha1.hexdigest() if has_text else None
+
+
+def cluster_userfiles(userfile_paths):
+    """Returns a list of lists of the paths of `userfile_paths` sharing a
+    `header_cluster_key`, largest clusters first. Paths keep their order
+    within a cluster. Files without a header block are each their own
+    cluster.
+    """
+    clusters = collections.OrderedDict()
+
+    for userfile_path in userfile_paths:
+        key = header_cluster_key(
+            header_region.read_header_region(
+                userfile_path,
+                CONFIG["HeaderRegionLines"],
             )
+        )
 
-            if response == "c" or response == "":
-                pass
-            elif response == "n":
-                return None
-            elif response == "q":
-                exit()
-            else:
-                # TODO: check against possible license names
-                return response
+        if key is None:
+            key = ("no header", userfile_path)
 
+        clusters.setdefault(key, []).append(userfile_path)
 
-        print(
-            ("\x1b[31;1m" if CONFIG["ANSIColors"] else "")
-            + "\n <> EOF <>"
-            + ("\x1b[0m" if CONFIG["ANSIColors"] else "")
+    return sorted(clusters.values(), key=len, reverse=True)
+
+
+def predict_license(userfile_lines):
+    """Returns the name and rank of the license sample best matching the
+    header region of a userfile's lines, ranked by `copyright_ranking` with
+    its first algorithm, or `None` if no sample reaches its `RankMin`.
+    """
+    _, algorithm_ranks, _ = copyright_ranking.rank_header_region(
+        (
+            None,
+            userfile_lines[:copyright_ranking.header_region_line_count()],
         )
+    )
+    _, ranks = algorithm_ranks[0]
+
+    if ranks:
+        rank, _, _, license = ranks[0]
+        return license, rank
+    else:
+        return None
+
+
+def read_userfile_lines(filepath):
+    """Returns the lines of a file. A file is only known to be text up to its
+    header region, so undecodable bytes after it are replaced.
+    """
+    with filepath.open("rt", errors="replace") as file:
+        return file.readlines()
+
+
+def prefetch_gen(clusters):
+    """Generator of a `Prefetch` of each cluster of `clusters`. A background
+    thread walks the clusters, reads their first file once and predicts its
+    license, up to `PrefetchFiles` clusters ahead of the one being asked.
+    """
+    prefetched = queue.Queue(maxsize=CONFIG["PrefetchFiles"])
+    done = object()
+
+    def _prefetch():
+        try:
+            for cluster in clusters:
+                lines = read_userfile_lines(cluster[0])
+                prefetched.put(
+                    Prefetch(
+                        cluster=cluster,
+                        lines=lines,
+                        prediction=(
+                            predict_license(lines)
+                            if CONFIG["PredictLicense"] else None
+                        ),
+                    )
+                )
+        except Exception as error:
+            prefetched.put(error)
+        else:
+            prefetched.put(done)
+
+    # a daemon thread doesn't keep a quitting reviewer waiting
+    threading.Thread(target=_prefetch, daemon=True).start()
+
+    for item in iter(prefetched.get, done):
+        if isinstance(item, Exception):
+            raise item
+
+        yield item
+
+
+def _prompt_choices(prediction, paging):
+    choices = ["<license>"]
+
+    if prediction is not None:
+        choices.append("(y) {} {:.1%}".format(*prediction))
+
+    if paging:
+        choices += ["(c)ontinue", "+<pages>"]
+
+    return "/".join(choices + ["(n)one", "(q)uit"])
+
+
+def get_manual_license_classification(lines, prediction=None):
+    """Pages through the lines of a file until the reviewer names its
+    license. Returns the license name, or `None` for no license.
+    `prediction` is a `(license_name, rank)` pair answered by "y".
+    """
+    line_count = len(lines)
+
+    # zero-based line number of the first line of the next page
+    lineno = 0
+
+    while True:
+        page = lines[lineno:lineno + CONFIG["PreviewLines"]]
+
+        print()
+        for line in page:
+            print(line, end="")
+
+        lineno += len(page)
+
+        if len(page) < CONFIG["PreviewLines"]:
+            break
 
         response = input(
             ("\x1b[33m" if CONFIG["ANSIColors"] else "")
-            + "\n<><><><><><><><><><><><"
-            + "\n<license>/(n)one/(q)uit"
+            + "\n<><><><><><><><><><><><><><><><><><><><><><>"
+            + "\n lines {}-{} of {}, page {} of {}".format(
+                lineno - len(page) + 1,
+                lineno,
+                line_count,
+                lineno // CONFIG["PreviewLines"],
+                -(-line_count // CONFIG["PreviewLines"]),
+            )
+            + "\n" + _prompt_choices(prediction, paging=True)
             + "\n "
             + ("\x1b[0m" if CONFIG["ANSIColors"] else "")
         )
 
-        if response == "n":
+        if response == "c" or response == "":
+            pass
+        elif response == "y" and prediction is not None:
+            return prediction[0]
+        elif response[:1] == "+" and response[1:].isdigit():
+            # the next page shown is `response` pages ahead
+            lineno = min(
+                lineno
+                + max(int(response[1:]) - 1, 0) * CONFIG["PreviewLines"],
+                line_count,
+            )
+        elif response == "n":
             return None
         elif response == "q":
             exit()
@@ -103,6 +280,30 @@ def get_manual_license_classification(filepath):
             # TODO: check against possible license names
             return response
 
+    print(
+        ("\x1b[31;1m" if CONFIG["ANSIColors"] else "")
+        + "\n <> EOF <>"
+        + ("\x1b[0m" if CONFIG["ANSIColors"] else "")
+    )
+
+    response = input(
+        ("\x1b[33m" if CONFIG["ANSIColors"] else "")
+        + "\n<><><><><><><><><><><><"
+        + "\n" + _prompt_choices(prediction, paging=False)
+        + "\n "
+        + ("\x1b[0m" if CONFIG["ANSIColors"] else "")
+    )
+
+    if response == "y" and prediction is not None:
+        return prediction[0]
+    elif response == "n":
+        return None
+    elif response == "q":
+        exit()
+    else:
+        # TODO: check against possible license names
+        return response
+
 
 if __name__ == "__main__":
     completed_files_set = set()
@@ -126,12 +327,53 @@ if __name__ == "__main__":
             ["userfile_path", "license_name"],
         )
 
-        for userfile_path in project_path_gen(CONFIG["ProjectDir"]):
-            filepath = str(userfile_path.relative_to(CONFIG["ProjectDir"]))
+        def _relative_path(userfile_path):
+            return str(userfile_path.relative_to(CONFIG["ProjectDir"]))
+
+        userfile_paths = (
+            userfile_path
+            for userfile_path in project_path_gen(CONFIG["ProjectDir"])
+            if _relative_path(userfile_path) not in completed_files_set
+        )
 
-            if filepath not in completed_files_set:
-                license = get_manual_license_classification(userfile_path)
+        if CONFIG["ClusterHeaders"]:
+            clusters = cluster_userfiles(userfile_paths)
+        else:
+            clusters = ([userfile_path] for userfile_path in userfile_paths)
+
+        if CONFIG["PredictLicense"]:
+            copyright_ranking.init_ranking_worker(
+                copyright_ranking.CONFIG["LicenseSampleFiles"]
+            )
+
+        for cluster, lines, prediction in prefetch_gen(clusters):
+            if len(cluster) > 1:
+                shown_paths = [
+                    _relative_path(userfile_path)
+                    for userfile_path in itertools.islice(
+                        cluster,
+                        CONFIG["ClusterMembersShown"],
+                    )
+                ]
+
+                if len(cluster) > len(shown_paths):
+                    shown_paths.append("...")
+
+                print(
+                    ("\x1b[36m" if CONFIG["ANSIColors"] else "")
+                    + "\n<> {} files share this header <>".format(
+                        len(cluster)
+                    )
+                    + "".join("\n  " + path for path in shown_paths)
+                    + ("\x1b[0m" if CONFIG["ANSIColors"] else "")
+                )
+
+            license = get_manual_license_classification(lines, prediction)
+
+            for userfile_path in cluster:
                 writer.writerow({
-                    "userfile_path": filepath,
+                    "userfile_path": _relative_path(userfile_path),
                     "license_name": license if license else "NOLICENSE",
                 })
+
+            output_file.flush()
@@ -0,0 +1,45 @@
+import numpy
+
+
+def adjust_ratios_by_total_header_lines(ratios, total_lines,
+                                        fair_total_lines):
+    """Returns `ratios` lessened for headers with fewer than
+    `fair_total_lines` lines. `total_lines` is the line amount of the header
+    of each ratio, or of all of them.
+    """
+    ratios = numpy.asarray(ratios, dtype=numpy.float64)
+    total_lines = numpy.asarray(total_lines, dtype=numpy.float64)
+
+    return numpy.where(
+        total_lines >= fair_total_lines,
+        ratios,
+        ratios ** ((fair_total_lines / total_lines) ** (1 / 4)),
+    )
+
+
+def floor_base(values, ndigits=0, base=10):
+    """Returns `values` floored to `ndigits` digits in `base`.
+    """
+    scale = float(base) ** ndigits
+
+    return (
+        numpy.floor(numpy.asarray(values, dtype=numpy.float64) * scale)
+        / scale
+    )
+
+
+def bucket_pairs(x, y, ndigits=6, base=2):
+    """Returns the arrays of the x and y values of each bucket of the
+    `(x, y)` points floored to `ndigits` digits in `base`, and the marker
+    size of each bucket grown by its amount of points.
+    """
+    buckets, counts = numpy.unique(
+        numpy.stack(
+            [floor_base(x, ndigits, base), floor_base(y, ndigits, base)],
+            axis=1,
+        ).reshape(-1, 2),
+        axis=0,
+        return_counts=True,
+    )
+
+    return buckets[:, 0], buckets[:, 1], 20 * counts ** 0.625
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import sqlite3 as sql
+import time
+
+# bump when ranking results or the cache tables change without a corpus or
+# CONFIG change; caches of another version are emptied when opened
+CACHE_VERSION = 2
+
+
+def ranking_fingerprint(corpus, config, keys):
+    """Returns a hex digest of the license corpus and the values of `keys` in
+    `config`. Rankings are only valid for the fingerprint they were made with.
+    """
+    return hashlib.sha1(
+        json.dumps(
+            [
+                CACHE_VERSION,
+                [(license.name, license.text) for license in corpus],
+                [(key, config[key]) for key in sorted(keys)],
+            ],
+        ).encode()
+    ).hexdigest()
+
+
+def open_ranking_cache(path, fingerprint):
+    """Returns a connection to the ranking cache at `path` and marks
+    `fingerprint` as its most recently used one. Rankings of other
+    fingerprints are kept until `prune_rankings` removes them.
+    """
+    conn = sql.connect(str(path))
+
+    with conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            conn.execute("DROP TABLE IF EXISTS header_rankings")
+            conn.execute("DROP TABLE IF EXISTS fingerprints")
+            conn.execute("PRAGMA user_version = {:d}".format(CACHE_VERSION))
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS header_rankings"
+            " ("
+                " digest TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " algorithm_ranks TEXT NOT NULL,"
+                " PRIMARY KEY (digest, fingerprint)"
+            " )"
+        )
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints"
+            " ("
+                " fingerprint TEXT PRIMARY KEY,"
+                " last_used REAL NOT NULL"
+            " )"
+        )
+
+        conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (fingerprint, last_used)"
+            " VALUES (?, ?)",
+            [fingerprint, time.time()],
+        )
+
+    return conn
+
+
+def prune_rankings(conn, kept_fingerprints):
+    """Removes the rankings of all but the `kept_fingerprints` most recently
+    used fingerprints. Returns the amount of rankings removed.
+    """
+    with conn:
+        conn.execute(
+            "DELETE FROM fingerprints WHERE fingerprint NOT IN"
+            " (SELECT fingerprint FROM fingerprints"
+            " ORDER BY last_used DESC LIMIT ?)",
+            [kept_fingerprints],
+        )
+
+        return conn.execute(
+            "DELETE FROM header_rankings WHERE fingerprint NOT IN"
+            " (SELECT fingerprint FROM fingerprints)"
+        ).rowcount
+
+
+def cached_rankings(conn, fingerprint, digests):
+    """Returns a dictionary of header region digests to cached algorithm
+    ranks for every digest in `digests` found in the cache.
+    """
+    rankings = {}
+
+    for digest in set(digests):
+        row = conn.execute(
+            "SELECT algorithm_ranks FROM header_rankings"
+            " WHERE digest = ? AND fingerprint = ?",
+            [digest, fingerprint],
+        ).fetchone()
+
+        if row is not None:
+            rankings[digest] = [
+                (algorithm, [tuple(rank) for rank in ranks])
+                for algorithm, ranks in json.loads(row[0])
+            ]
+
+    return rankings
+
+
+def store_rankings(conn, fingerprint, rankings):
+    """Stores `(digest, algorithm_ranks)` pairs of `rankings` in the cache in
+    a single transaction.
+    """
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO header_rankings"
+            " (digest, fingerprint, algorithm_ranks) VALUES (?, ?, ?)",
+            (
+                (digest, fingerprint, json.dumps(algorithm_ranks))
+                for digest, algorithm_ranks in rankings
+            ),
+        )
@@ -0,0 +1,236 @@
+import csv
+import functools
+
+import numpy
+
+from ranking_snapshot import load_snapshot
+
+# one row per calculated rank, `manual_license` is -1 for unclassified files
+RANK_DTYPE = numpy.dtype([
+    ("file", numpy.int64),
+    ("algorithm", numpy.int64),
+    ("license", numpy.int64),
+    ("manual_license", numpy.int64),
+    ("ranking", numpy.float64),
+    ("position_lineno", numpy.int64),
+])
+
+
+def group_by(rows, *key_arrays):
+    """Returns a dictionary of each distinct tuple of `key_arrays` values to
+    the rows of `rows` having it. Rows keep their order within a group.
+    """
+    keys, inverse = numpy.unique(
+        numpy.stack(key_arrays, axis=1),
+        axis=0,
+        return_inverse=True,
+    )
+    inverse = inverse.reshape(-1)
+
+    order = numpy.argsort(inverse, kind="stable")
+    bounds = numpy.cumsum(numpy.bincount(inverse, minlength=len(keys)))[:-1]
+
+    return dict(
+        zip(
+            map(tuple, keys.tolist()),
+            numpy.split(rows[order], bounds),
+        )
+    )
+
+
+def read_database_arrays(conn):
+    """Returns a dictionary of the arrays of a `RankingData`, read from the
+    license database of `conn` with a single scan of
+    `calculated_license_rank`.
+    """
+    licenses = conn.execute("SELECT id, name FROM licenses").fetchall()
+    algorithms = conn.execute(
+        "SELECT id, name FROM ranking_algorithms"
+    ).fetchall()
+
+    return {
+        "license_ids" : numpy.array(
+            [license_id for license_id, _ in licenses],
+            dtype=numpy.int64,
+        ),
+        "license_names" : numpy.array(
+            [name for _, name in licenses],
+            dtype=str,
+        ),
+        "algorithm_ids" : numpy.array(
+            [algorithm_id for algorithm_id, _ in algorithms],
+            dtype=numpy.int64,
+        ),
+        "algorithm_names" : numpy.array(
+            [name for _, name in algorithms],
+            dtype=str,
+        ),
+        "manual_licenses" : numpy.fromiter(
+            conn.execute(
+                "SELECT IFNULL(manual_license, -1) FROM project_files"
+            ),
+            dtype=[("manual_license", numpy.int64)],
+        )["manual_license"],
+        "ranks" : numpy.fromiter(
+            conn.execute(
+                "SELECT"
+                " calculated_license_rank.file,"
+                " calculated_license_rank.algorithm,"
+                " calculated_license_rank.license,"
+                " IFNULL(project_files.manual_license, -1),"
+                " calculated_license_rank.ranking,"
+                " calculated_license_rank.position_lineno"
+                " FROM calculated_license_rank"
+                " JOIN project_files"
+                " ON calculated_license_rank.file = project_files.id"
+            ),
+            dtype=RANK_DTYPE,
+        ),
+    }
+
+
+def read_csv_arrays(header_csv_path, rankings_csv_path):
+    """Returns a dictionary of arrays of the header line amounts and of the
+    columns of a ranking CSV written by `ranking_writers.CsvRankingWriter`.
+    `license` indexes `header_names`.
+    """
+    with open(header_csv_path, "rt") as header_file:
+        header_names, header_total_lines = zip(
+            *(
+                (row["header_name"], int(row["total_lines"]))
+                for row in csv.DictReader(header_file)
+            )
+        )
+
+    header_indices = {name : index for index, name in enumerate(header_names)}
+
+    with open(rankings_csv_path, "rt") as rankings_file:
+        rows = numpy.fromiter(
+            (
+                (
+                    header_indices[row["license_name"]],
+                    row["diff_ratio"],
+                    row["diff_lineno"],
+                    row["levenshtein_ratio"],
+                    row["levenshtein_lineno"],
+                )
+                for row in csv.DictReader(rankings_file)
+            ),
+            dtype=[
+                ("license", numpy.int64),
+                ("diff_ratio", numpy.float64),
+                ("diff_lineno", numpy.int64),
+                ("levenshtein_ratio", numpy.float64),
+                ("levenshtein_lineno", numpy.int64),
+            ],
+        )
+
+    arrays = {name : rows[name] for name in rows.dtype.names}
+    arrays["header_names"] = numpy.array(header_names, dtype=str)
+    arrays["header_total_lines"] = numpy.array(
+        header_total_lines,
+        dtype=numpy.int64,
+    )
+
+    return arrays
+
+
+def load_csv_arrays(config):
+    """Returns the arrays of `read_csv_arrays` for the `HeaderLinesCSV` and
+    `CalculatedRankingsCSV` paths of `config`, from its `SnapshotFile` if
+    that is not `None`.
+    """
+    build_arrays = functools.partial(
+        read_csv_arrays,
+        config["HeaderLinesCSV"],
+        config["CalculatedRankingsCSV"],
+    )
+
+    if config["SnapshotFile"] is None:
+        return build_arrays()
+    else:
+        return load_snapshot(
+            config["SnapshotFile"],
+            [config["HeaderLinesCSV"], config["CalculatedRankingsCSV"]],
+            build_arrays,
+        )
+
+
+class RankingData:
+    """Every calculated rank of the license database in a `RANK_DTYPE`
+    structured array, and the manual license of every project file, from
+    the arrays of `read_database_arrays` or of a snapshot of them. Plots take
+    vectorized views of these arrays instead of running their own queries.
+    """
+    def __init__(self, arrays):
+        self.license_names = dict(
+            zip(
+                arrays["license_ids"].tolist(),
+                arrays["license_names"].tolist(),
+            )
+        )
+        self.algorithm_names = dict(
+            zip(
+                arrays["algorithm_ids"].tolist(),
+                arrays["algorithm_names"].tolist(),
+            )
+        )
+        self.license_ids = {
+            name : license_id
+            for license_id, name in self.license_names.items()
+        }
+
+        self.manual_licenses = arrays["manual_licenses"]
+        self.ranks = arrays["ranks"]
+
+        self._best_ranks = None
+
+    def best_ranks(self):
+        """Returns the rows of the best ranked license of each file and
+        algorithm, ordered by file and algorithm.
+        """
+        if self._best_ranks is None:
+            order = numpy.lexsort((
+                self.ranks["ranking"],
+                self.ranks["algorithm"],
+                self.ranks["file"],
+            ))
+            ranks = self.ranks[order]
+
+            # the last, highest ranked row of each file and algorithm
+            is_last = numpy.ones(len(ranks), dtype=bool)
+            is_last[:-1] = (
+                (ranks["file"][1:] != ranks["file"][:-1])
+                | (ranks["algorithm"][1:] != ranks["algorithm"][:-1])
+            )
+
+            self._best_ranks = ranks[is_last]
+
+        return self._best_ranks
+
+    def license_ranks(self, rows, license_name):
+        """Returns the rank of the license named `license_name` for each row
+        of `rows`, by file and algorithm, or NaN where it wasn't ranked.
+        `rows` has at most one row per file and algorithm.
+        """
+        license_rows = self.ranks[
+            self.ranks["license"] == self.license_ids.get(license_name, -1)
+        ]
+
+        algorithm_span = max(self.algorithm_names, default=0) + 1
+        rows_key = rows["file"] * algorithm_span + rows["algorithm"]
+        license_key = (
+            license_rows["file"] * algorithm_span + license_rows["algorithm"]
+        )
+
+        _, rows_index, license_index = numpy.intersect1d(
+            rows_key,
+            license_key,
+            assume_unique=True,
+            return_indices=True,
+        )
+
+        ranks = numpy.full(len(rows), numpy.nan)
+        ranks[rows_index] = license_rows["ranking"][license_index]
+
+        return ranks
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+
+import numpy
+
+
+def _file_sha1(path):
+    sha1 = hashlib.sha1()
+
+    with open(str(path), "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            sha1.update(block)
+
+    return sha1.hexdigest()
+
+
+def _source_stamps(source_paths, known_stamps):
+    """Returns a list of `[path, mtime_ns, sha1]` of each existing path of
+    `source_paths`. A file is only hashed if its mtime differs from the one
+    in `known_stamps`.
+    """
+    stamps = []
+
+    for path in map(str, source_paths):
+        if os.path.exists(path):
+            mtime_ns = os.stat(path).st_mtime_ns
+
+            if path in known_stamps and known_stamps[path][0] == mtime_ns:
+                sha1 = known_stamps[path][1]
+            else:
+                sha1 = _file_sha1(path)
+
+            stamps.append([path, mtime_ns, sha1])
+
+    return stamps
+
+
+def load_snapshot(snapshot_path, source_paths, build_arrays):
+    """Returns a lazily loaded mapping of array names to the arrays saved in
+    the `.npz` snapshot at `snapshot_path`. If the snapshot is missing, or if
+    a file of `source_paths` has changed since it was saved, the snapshot is
+    saved again from the dictionary of arrays returned by `build_arrays()`.
+
+    A source file whose mtime changed is hashed; the snapshot is still used
+    if the hash didn't change.
+    """
+    try:
+        snapshot = numpy.load(str(snapshot_path))
+        snapshot_stamps = json.loads(str(snapshot["_source_stamps"]))
+    except (OSError, KeyError, ValueError):
+        snapshot = None
+        snapshot_stamps = []
+
+    stamps = _source_stamps(
+        source_paths,
+        {path : (mtime_ns, sha1) for path, mtime_ns, sha1 in snapshot_stamps},
+    )
+
+    if snapshot is not None:
+        if stamps == snapshot_stamps:
+            return snapshot
+
+        if [
+            [path, sha1] for path, _, sha1 in stamps
+        ] == [
+            [path, sha1] for path, _, sha1 in snapshot_stamps
+        ]:
+            # only mtimes changed, save them so the files aren't hashed again
+            arrays = {
+                name : snapshot[name]
+                for name in snapshot.files
+                if name != "_source_stamps"
+            }
+        else:
+            arrays = None
+
+        snapshot.close()
+    else:
+        arrays = None
+
+    if arrays is None:
+        arrays = build_arrays()
+
+    with open(str(snapshot_path), "wb") as snapshot_file:
+        numpy.savez(
+            snapshot_file,
+            _source_stamps=numpy.array(json.dumps(stamps)),
+            **arrays
+        )
+
+    return numpy.load(str(snapshot_path))
@@ -0,0 +1,173 @@
+import csv
+import json
+import sys
+
+import license_database
+
+# `csv_to_database.py` column prefix of each ranking algorithm
+CSV_ALGORITHM_COLUMNS = {
+    "ratcliff-obershelp" : "diff",
+    "levenshtein" : "levenshtein",
+}
+
+
+def _open_output(path):
+    """Returns the file opened for writing at `path`, or stdout if `path` is
+    `None`.
+    """
+    if path is None:
+        return sys.stdout
+    else:
+        return open(str(path), "wt", newline="")
+
+
+class CsvRankingWriter:
+    """Writes one row per userfile and license in the schema read by
+    `csv_to_database.py` and `scatter_plot.py`. Only licenses ranked by every
+    algorithm in `CSV_ALGORITHM_COLUMNS` are written, so with a
+    `copyright_ranking` `OutputRankMin` above 0, every license either
+    algorithm ranks lower is left out.
+    """
+    fieldnames = ["userfile_path", "license_name"] + [
+        "{}_{}".format(prefix, column)
+        for prefix in CSV_ALGORITHM_COLUMNS.values()
+        for column in ["ratio", "lineno"]
+    ]
+
+    def __init__(self, path):
+        self.output_file = _open_output(path)
+        self.writer = csv.DictWriter(self.output_file, self.fieldnames)
+        self.writer.writeheader()
+
+    def write(self, path, digest, algorithm_ranks):
+        columns = {}
+        for algorithm, ranks in algorithm_ranks:
+            if algorithm in CSV_ALGORITHM_COLUMNS:
+                prefix = CSV_ALGORITHM_COLUMNS[algorithm]
+
+                for _, diff_rank, lineno, license in ranks:
+                    columns.setdefault(license, {}).update({
+                        prefix + "_ratio" : diff_rank,
+                        prefix + "_lineno" : lineno,
+                    })
+
+        for license in sorted(columns):
+            if len(columns[license]) == 2 * len(CSV_ALGORITHM_COLUMNS):
+                self.writer.writerow(
+                    dict(
+                        columns[license],
+                        userfile_path=path,
+                        license_name=license,
+                    )
+                )
+
+        self.output_file.flush()
+
+    def close(self):
+        if self.output_file is not sys.stdout:
+            self.output_file.close()
+
+
+class JsonLinesRankingWriter:
+    """Writes one JSON object per userfile with its header region digest and
+    its license ranks per algorithm.
+    """
+    def __init__(self, path):
+        self.output_file = _open_output(path)
+
+    def write(self, path, digest, algorithm_ranks):
+        self.output_file.write(
+            json.dumps({
+                "userfile_path" : path,
+                "header_digest" : digest,
+                "rankings" : {
+                    algorithm : [
+                        {
+                            "license_name" : license,
+                            "rank" : rank,
+                            "diff_rank" : diff_rank,
+                            "lineno" : lineno,
+                        }
+                        for rank, diff_rank, lineno, license in ranks
+                    ]
+                    for algorithm, ranks in algorithm_ranks
+                },
+            })
+            + "\n"
+        )
+
+        self.output_file.flush()
+
+    def close(self):
+        if self.output_file is not sys.stdout:
+            self.output_file.close()
+
+
+class SqliteRankingWriter:
+    """Writes the ranks of each userfile into the `calculated_license_rank`
+    table of the license database at `path`. Rows are inserted
+    `batch_size` at a time in one transaction; file, license and algorithm
+    ids are resolved from in memory maps.
+    """
+    def __init__(self, path, batch_size=4096):
+        if path is None:
+            raise ValueError("sqlite output needs an OutputFile path")
+
+        self.conn = license_database.connect(path)
+        self.batch_size = batch_size
+        self.file_ids = license_database.IdMap(
+            self.conn, "project_files", "path"
+        )
+        self.license_ids = license_database.IdMap(self.conn, "licenses")
+        self.algorithm_ids = license_database.IdMap(
+            self.conn, "ranking_algorithms"
+        )
+        self.rows = []
+
+    def write(self, path, digest, algorithm_ranks):
+        file_id = self.file_ids[path]
+
+        for algorithm, ranks in algorithm_ranks:
+            algorithm_id = self.algorithm_ids[algorithm]
+
+            self.rows += [
+                (
+                    file_id,
+                    algorithm_id,
+                    self.license_ids[license],
+                    diff_rank,
+                    lineno,
+                )
+                for _, diff_rank, lineno, license in ranks
+            ]
+
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Inserts the pending rows, and the ids made for them, in one
+        transaction.
+        """
+        with self.conn:
+            self.conn.executemany(
+                license_database.UPSERT_CALCULATED_LICENSE_RANK,
+                self.rows,
+            )
+            license_database.update_best_license_ranks(
+                self.conn,
+                (row[0] for row in self.rows),
+            )
+
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+# output format name to writer class
+ranking_writer_dict = {
+    "csv" : CsvRankingWriter,
+    "jsonl" : JsonLinesRankingWriter,
+    "sqlite" : SqliteRankingWriter,
+}
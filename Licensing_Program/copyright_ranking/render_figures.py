@@ -0,0 +1,279 @@
+#! /usr/bin/env python3
+
+import functools
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+
+import matplotlib
+
+# headless rendering, before any module imports pyplot
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+import bar_plot
+import compare_algorithms
+import scatter_plot
+from bar_graph_manual_licenses import bar_graph_manual_licenses
+from hist_sameness_distributions import hist_sameness_distributions
+from hist_cecill_deltaerror_rank_distribution \
+    import hist_cecill_deltaerror_rank_distribution
+from ranking_data import RankingData, load_csv_arrays
+
+CONFIG = {
+    "OutputDir" : "figures",
+    "Formats" : ["png", "svg"],
+    # `None` uses one worker per CPU
+    "Processes" : None,
+    # input data hash of each job at its last render, relative to OutputDir
+    "RenderHashesFile" : "render_hashes.json",
+}
+
+# per worker input arrays of each source, set by `init_render_worker`
+SOURCE_ARRAYS = {}
+
+
+def _manual_licenses_figures(arrays):
+    return {
+        "manual_licenses" : bar_graph_manual_licenses(
+            RankingData(arrays),
+            itertools.cycle(compare_algorithms.COLORS),
+        ),
+    }
+
+
+def _sameness_figures(arrays):
+    rank_dist_fig, rank_dist_license_fig = hist_sameness_distributions(
+        RankingData(arrays),
+        itertools.cycle(compare_algorithms.COLORS),
+    )
+
+    return {
+        "sameness" : rank_dist_fig,
+        "sameness_per_license" : rank_dist_license_fig,
+    }
+
+
+def _cecill_deltaerror_figures(arrays):
+    return {
+        "cecill_deltaerror" : hist_cecill_deltaerror_rank_distribution(
+            RankingData(arrays),
+            itertools.cycle(compare_algorithms.COLORS),
+        ),
+    }
+
+
+def _scatter_figures(arrays):
+    return {
+        "scatter_" + license : fig
+        for license, fig in scatter_plot.scatter_plot_figures(arrays).items()
+    }
+
+
+def _bar_figures(arrays):
+    return {
+        "bar_" + license : fig
+        for license, fig in bar_plot.bar_plot_figures(arrays).items()
+    }
+
+
+# job name to its input source, the modules drawing it and its figures
+render_job_dict = {
+    "manual_licenses" : (
+        "database",
+        ["bar_graph_manual_licenses", "compare_algorithms", "ranking_data"],
+        _manual_licenses_figures,
+    ),
+    "sameness" : (
+        "database",
+        [
+            "hist_sameness_distributions",
+            "compare_algorithms",
+            "ranking_data",
+        ],
+        _sameness_figures,
+    ),
+    "cecill_deltaerror" : (
+        "database",
+        [
+            "hist_cecill_deltaerror_rank_distribution",
+            "compare_algorithms",
+            "ranking_data",
+        ],
+        _cecill_deltaerror_figures,
+    ),
+    "scatter" : ("csv", ["scatter_plot", "plot_arrays"], _scatter_figures),
+    "bar" : ("csv", ["bar_plot", "plot_arrays"], _bar_figures),
+}
+
+# source name to the function loading its arrays
+source_loader_dict = {
+    "database" : compare_algorithms.load_database_arrays,
+    "csv" : functools.partial(load_csv_arrays, scatter_plot.CONFIG),
+}
+
+
+def arrays_digest(arrays):
+    """Returns a SHA-1 object updated with every array of `arrays`.
+    """
+    sha1 = hashlib.sha1()
+
+    for name in sorted(arrays):
+        array = arrays[name]
+        sha1.update(
+            json.dumps([name, str(array.dtype), array.shape]).encode()
+        )
+        sha1.update(array.tobytes())
+
+    return sha1
+
+
+def job_hash(job_name, source_digest):
+    """Returns the hex digest of a job's input data, the source of the
+    modules drawing it and the output formats.
+    """
+    sha1 = source_digest.copy()
+    sha1.update(json.dumps([job_name, CONFIG["Formats"]]).encode())
+
+    for module_name in render_job_dict[job_name][1]:
+        with open(sys.modules[module_name].__file__, "rb") as module_file:
+            sha1.update(module_file.read())
+
+    return sha1.hexdigest()
+
+
+def init_render_worker(source_arrays):
+    """`multiprocessing.Pool` initializer. Keeps the input arrays of every
+    source for all jobs rendered by the worker.
+    """
+    SOURCE_ARRAYS.update(source_arrays)
+
+
+def render_job(job_name):
+    """Draws the figures of a job and saves each one in every format.
+    Returns the job name, the paths written and `None`, or the job name, no
+    paths and the formatted exception if the job failed, so one failing job
+    doesn't stop the others.
+    """
+    source, _, figures_func = render_job_dict[job_name]
+    paths = []
+
+    try:
+        for figure_name, fig in sorted(
+            figures_func(SOURCE_ARRAYS[source]).items()
+        ):
+            for fmt in CONFIG["Formats"]:
+                path = os.path.join(
+                    CONFIG["OutputDir"],
+                    "{}.{}".format(figure_name, fmt),
+                )
+                fig.savefig(path, format=fmt)
+                paths.append(path)
+
+            plt.close(fig)
+    except Exception:
+        plt.close("all")
+        return job_name, [], traceback.format_exc()
+
+    return job_name, paths, None
+
+
+if __name__ == "__main__":
+    job_names = sys.argv[1:] or sorted(render_job_dict.keys())
+    unknown_jobs = sorted(set(job_names) - set(render_job_dict.keys()))
+
+    if unknown_jobs:
+        sys.exit(
+            "unknown jobs: {}\nvalid jobs: {}".format(
+                ", ".join(unknown_jobs),
+                ", ".join(sorted(render_job_dict.keys())),
+            )
+        )
+
+    os.makedirs(CONFIG["OutputDir"], exist_ok=True)
+    hashes_path = os.path.join(
+        CONFIG["OutputDir"],
+        CONFIG["RenderHashesFile"],
+    )
+
+    try:
+        with open(hashes_path, "rt") as hashes_file:
+            render_hashes = json.load(hashes_file)
+    except FileNotFoundError:
+        render_hashes = {}
+
+    source_arrays = {}
+    source_digests = {}
+    for source in sorted({render_job_dict[name][0] for name in job_names}):
+        arrays = source_loader_dict[source]()
+        # without the stamps of a snapshot, which change with source mtimes
+        source_arrays[source] = {
+            name : arrays[name]
+            for name in arrays
+            if name != "_source_stamps"
+        }
+        source_digests[source] = arrays_digest(source_arrays[source])
+
+    new_hashes = {
+        name : job_hash(name, source_digests[render_job_dict[name][0]])
+        for name in job_names
+    }
+    stale_jobs = [
+        name
+        for name in job_names
+        if render_hashes.get(name, {}).get("hash") != new_hashes[name]
+        or not all(map(os.path.exists, render_hashes[name]["paths"]))
+    ]
+
+    for name in sorted(set(job_names) - set(stale_jobs)):
+        print("unchanged: {}".format(name), file=sys.stderr)
+
+    failed_jobs = []
+
+    if stale_jobs:
+        with multiprocessing.Pool(
+            CONFIG["Processes"],
+            initializer=init_render_worker,
+            initargs=(
+                {
+                    source : arrays
+                    for source, arrays in source_arrays.items()
+                    if any(
+                        render_job_dict[name][0] == source
+                        for name in stale_jobs
+                    )
+                },
+            ),
+        ) as pool:
+            for name, paths, error in pool.imap_unordered(
+                render_job,
+                stale_jobs,
+            ):
+                if error is not None:
+                    # rendered again on the next run
+                    render_hashes.pop(name, None)
+                    failed_jobs.append(name)
+                    print(
+                        "failed: {}\n{}".format(name, error),
+                        file=sys.stderr,
+                    )
+                else:
+                    render_hashes[name] = {
+                        "hash" : new_hashes[name],
+                        "paths" : paths,
+                    }
+                    print(
+                        "rendered: {} ({} files)".format(name, len(paths)),
+                        file=sys.stderr,
+                    )
+
+                with open(hashes_path, "wt") as hashes_file:
+                    json.dump(render_hashes, hashes_file, indent=2)
+
+    if failed_jobs:
+        sys.exit("failed jobs: {}".format(", ".join(sorted(failed_jobs))))
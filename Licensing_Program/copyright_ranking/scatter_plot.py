@@ -1,112 +1,69 @@
 #! /usr/bin/env python3
 
-import collections
-import csv
-import math
-
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
+from plot_arrays import adjust_ratios_by_total_header_lines, bucket_pairs
+from ranking_data import load_csv_arrays
+
 CONFIG = {
     "FairTotalLines" : 16,
+    "HeaderLinesCSV" : "header_info.csv",
+    "CalculatedRankingsCSV" : "specfem3d_info.csv",
+    # arrays read from the CSV files, `None` parses them every run
+    "SnapshotFile" : "specfem3d_info.npz",
 }
 
 
-def adjust_ratio_by_total_header_lines(ratio, total_lines):
-    if total_lines >= CONFIG["FairTotalLines"]:
-        return ratio
-    else:
-        return ratio ** ((CONFIG["FairTotalLines"] / total_lines) ** (1 / 4))
-
-
-def round_base(x, ndigits=0, base=10):
-    if ndigits >= 0:
-        for _ in range(ndigits):
-            x *= base
-    else:
-        for _ in range(ndigits, 0):
-            x /= base
-
-    x = float(int(x))
-
-    if ndigits >= 0:
-        for _ in range(ndigits):
-            x /= base
-    else:
-        for _ in range(ndigits, 0):
-            x *= base
-
-    return x
-
-
-def bucket_pairs(pairs):
-    return [
-        (x, y, 20 * size ** 0.625)
-        for (x, y), size in collections.Counter(
-            (round_base(x, 6, 2), round_base(y, 6, 2)) for x, y in pairs
-        ).items()
-    ]
-
-
-if __name__ == "__main__":
-    with open("header_info.csv", "rt") as header_csv:
-        header_info = csv.DictReader(header_csv)
-
-        header_info = dict(
-            (row["header_name"], int(row["total_lines"]))
-            for row in header_info
+def scatter_plot_figures(arrays):
+    """Returns a dictionary of license names to figures of the diff and
+    Levenshtein ratio pairs of `arrays`, split by whether both algorithms
+    found the license on the same line.
+    """
+    header_info = dict(
+        zip(
+            arrays["header_names"].tolist(),
+            arrays["header_total_lines"].tolist(),
         )
-
-    with open("specfem3d_info.csv", "rt") as specfem3d_csv:
-        specfem3d_info = csv.DictReader(specfem3d_csv)
-
-        data_eq = {
-            license : collections.defaultdict(list) for license in header_info
-        }
-        data_neq = {
-            license : collections.defaultdict(list) for license in header_info
-        }
-
-        for row in specfem3d_info:
-            if row["diff_lineno"] == row["levenshtein_lineno"]:
-                data_eq[row["license_name"]]["ratio_pair"].append((
-                    float(row["diff_ratio"]),
-                    float(row["levenshtein_ratio"]),
-                ))
-                if header_info[row["license_name"]] < CONFIG["FairTotalLines"]:
-                    data_eq[
-                        row["license_name"]
-                    ]["adjusted_ratio_pair"].append(
-                        (
-                            adjust_ratio_by_total_header_lines(
-                                float(row["diff_ratio"]),
-                                header_info[row["license_name"]],
-                            ),
-                            adjust_ratio_by_total_header_lines(
-                                float(row["levenshtein_ratio"]),
-                                header_info[row["license_name"]],
-                            ),
-                        )
-                    )
-            else:
-                data_neq[row["license_name"]]["ratio_pair"].append((
-                    float(row["diff_ratio"]),
-                    float(row["levenshtein_ratio"]),
-                ))
-                if header_info[row["license_name"]] < CONFIG["FairTotalLines"]:
-                    data_neq[
-                        row["license_name"]
-                    ]["adjusted_ratio_pair"].append(
-                        (
-                            adjust_ratio_by_total_header_lines(
-                                float(row["diff_ratio"]),
-                                header_info[row["license_name"]],
-                            ),
-                            adjust_ratio_by_total_header_lines(
-                                float(row["levenshtein_ratio"]),
-                                header_info[row["license_name"]],
-                            ),
-                        )
+    )
+
+    # a snapshot reads its arrays on every access
+    licenses = arrays["license"]
+    diff_ratios = arrays["diff_ratio"]
+    levenshtein_ratios = arrays["levenshtein_ratio"]
+    total_lines = arrays["header_total_lines"][licenses]
+    is_eq = arrays["diff_lineno"] == arrays["levenshtein_lineno"]
+
+    adjusted_diff_ratios = adjust_ratios_by_total_header_lines(
+        diff_ratios,
+        total_lines,
+        CONFIG["FairTotalLines"],
+    )
+    adjusted_levenshtein_ratios = adjust_ratios_by_total_header_lines(
+        levenshtein_ratios,
+        total_lines,
+        CONFIG["FairTotalLines"],
+    )
+
+    data_eq = {license : {} for license in header_info}
+    data_neq = {license : {} for license in header_info}
+
+    for index, license in enumerate(arrays["header_names"].tolist()):
+        is_license = licenses == index
+
+        for data, is_lineno_eq in [(data_eq, is_eq), (data_neq, ~is_eq)]:
+            rows = is_license & is_lineno_eq
+
+            if rows.any():
+                data[license]["ratio_pair"] = (
+                    diff_ratios[rows],
+                    levenshtein_ratios[rows],
+                )
+
+                if header_info[license] < CONFIG["FairTotalLines"]:
+                    data[license]["adjusted_ratio_pair"] = (
+                        adjusted_diff_ratios[rows],
+                        adjusted_levenshtein_ratios[rows],
                     )
 
     license_figs = {license : plt.figure() for license in header_info}
@@ -122,7 +79,7 @@ if __name__ == "__main__":
 
             ax = fig.gca()
             ax.scatter(
-                *zip(*bucket_pairs(data_types[data_name])),
+                *bucket_pairs(*data_types[data_name]),
                 alpha=0.375,
                 color="teal",
                 edgecolor="none",
@@ -145,7 +102,7 @@ if __name__ == "__main__":
 
             ax = fig.gca()
             ax.scatter(
-                *zip(*bucket_pairs(data_types[data_name])),
+                *bucket_pairs(*data_types[data_name]),
                 alpha=0.375,
                 color="maroon",
                 edgecolor="none",
@@ -157,6 +114,12 @@ if __name__ == "__main__":
             ax.set_ylabel("Levenshtein Ratio")
             ax.grid(True)
 
+    return license_figs
+
+
+if __name__ == "__main__":
+    scatter_plot_figures(load_csv_arrays(CONFIG))
+
     plt.show()
 
 
@@ -1,53 +1,216 @@
 #! /usr/bin/env python3
 
+import argparse
+import csv
+import heapq
+import itertools
 import sqlite3 as sql
+import sys
 
 CONFIG = {
     "Specfem3dDB" : "specfem3d_license_info.db",
     "RecordLimit" : 10,
+    "RankMin" : 0.75,
+    "ManualLicense" : "NOLICENSE",
 }
 
+# best ranks of one algorithm, read through the
+# `best_license_rank_algorithm_ranking` index from the highest rank down
+TOP_RANKINGS_QUERY = """
+    SELECT
+      project_files.path,
+      calc_licenses.name,
+      best_license_rank.ranking,
+      best_license_rank.position_lineno
+    FROM
+          best_license_rank
+      JOIN
+          project_files
+        ON
+          best_license_rank.file = project_files.id
+      JOIN
+          licenses AS calc_licenses
+        ON
+          best_license_rank.license = calc_licenses.id
+    WHERE
+        best_license_rank.algorithm = :algorithm
+      AND
+        best_license_rank.ranking >= :rank_min
+      AND
+        project_files.manual_license = :manual_license
+    ORDER BY
+      best_license_rank.ranking DESC
+    LIMIT
+      :limit
+"""
+
+CSV_FIELDNAMES = [
+    "userfile_path",
+    "algorithm",
+    "license_name",
+    "ranking",
+    "position_lineno",
+]
+
+
+def has_best_license_ranks(conn):
+    """Returns whether the database of `conn` has the `best_license_rank`
+    table, which databases written before it was added lack.
+    """
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master"
+        " WHERE type = 'table' AND name = 'best_license_rank'"
+    ).fetchone() is not None
+
+
+def top_rankings(conn, manual_license, rank_min, limit, algorithms=None):
+    """Generator of the `limit` highest best ranks of at least `rank_min`,
+    over files manually classified as `manual_license`, as
+    `(path, algorithm, license_name, ranking, position_lineno)` tuples. Every
+    algorithm is queried on its own with the same prepared statement, and
+    the results are merged by rank. `algorithms` of `None` uses all of them.
+    """
+    manual_license_row = conn.execute(
+        "SELECT id FROM licenses WHERE name = ?",
+        [manual_license],
+    ).fetchone()
+
+    if manual_license_row is None:
+        return
+
+    algorithm_ids = dict(
+        conn.execute("SELECT name, id FROM ranking_algorithms")
+    )
+
+    if algorithms is None:
+        algorithms = sorted(algorithm_ids.keys())
+
+    for algorithm in algorithms:
+        if algorithm not in algorithm_ids:
+            raise ValueError(
+                "unknown ranking algorithm {!r}, not one of {}".format(
+                    algorithm,
+                    sorted(algorithm_ids.keys()),
+                )
+            )
+
+    def _algorithm_rankings(algorithm):
+        for path, license, ranking, lineno in conn.execute(
+            TOP_RANKINGS_QUERY,
+            {
+                "algorithm" : algorithm_ids[algorithm],
+                "rank_min" : rank_min,
+                "manual_license" : manual_license_row[0],
+                "limit" : limit,
+            },
+        ):
+            yield path, algorithm, license, ranking, lineno
+
+    yield from itertools.islice(
+        heapq.merge(
+            *(
+                # each query's rows are fetched as the merge needs them
+                _algorithm_rankings(algorithm)
+                for algorithm in algorithms
+            ),
+            key=lambda row: -row[3],
+        ),
+        limit,
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=("List the files manually classified as a license whose"
+                     " best calculated rank is highest."),
+    )
+    parser.add_argument(
+        "-d",
+        "--database",
+        default=CONFIG["Specfem3dDB"],
+        help="license database (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-t",
+        "--rank-min",
+        type=float,
+        default=CONFIG["RankMin"],
+        help="lowest best rank listed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-a",
+        "--algorithm",
+        action="append",
+        dest="algorithms",
+        help="ranking algorithm, may be repeated (default: all algorithms)",
+    )
+    parser.add_argument(
+        "-m",
+        "--manual-license",
+        default=CONFIG["ManualLicense"],
+        help="manually classified license of the files (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-k",
+        "--limit",
+        type=int,
+        default=CONFIG["RecordLimit"],
+        help="amount of files listed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help="write the results to stdout as CSV",
+    )
+
+    return parser
+
 
 if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args(sys.argv[1:])
+
     with sql.connect(
-        "file:{}?mode=ro".format(CONFIG["Specfem3dDB"]),
+        "file:{}?mode=ro".format(args.database),
         uri=True,
     ) as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT
-              project_files.path,
-              ranking_algorithms.name,
-              calculated_license_rank.ranking
-            FROM
-                  calculated_license_rank
-              JOIN
-                  project_files
-                ON
-                  calculated_license_rank.file = project_files.id
-              JOIN
-                  licenses AS manu_licenses
-                ON
-                  project_files.manual_license = manu_licenses.id
-              JOIN
-                  ranking_algorithms
-                ON
-                  calculated_license_rank.algorithm = ranking_algorithms.id
-            WHERE
-                manu_licenses.name = 'NOLICENSE'
-              AND
-                calculated_license_rank.ranking >= 0.75
-            GROUP BY
-                calculated_license_rank.file,
-                calculated_license_rank.algorithm
-              HAVING
-                MAX(calculated_license_rank.ranking)
-            ORDER BY
-              calculated_license_rank.ranking DESC
-            LIMIT
-              ?
-        """, [CONFIG["RecordLimit"]])
-
-        for filepath, algorithm, rank in cursor:
-            print("{} - {} : {}".format(filepath, algorithm, rank))
+        if not has_best_license_ranks(conn):
+            sys.exit(
+                ("{} has no best_license_rank table; rerun"
+                 " csv_to_database.py to add it").format(args.database)
+            )
+
+        algorithm_names = sorted(
+            name
+            for name, in conn.execute("SELECT name FROM ranking_algorithms")
+        )
+        unknown_algorithms = sorted(
+            set(args.algorithms or []) - set(algorithm_names)
+        )
+
+        if unknown_algorithms:
+            parser.error(
+                "unknown algorithm {}, choose from {}".format(
+                    ", ".join(unknown_algorithms),
+                    ", ".join(algorithm_names),
+                )
+            )
+
+        rows = top_rankings(
+            conn,
+            args.manual_license,
+            args.rank_min,
+            args.limit,
+            args.algorithms,
+        )
+
+        if args.csv:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(CSV_FIELDNAMES)
+
+            for row in rows:
+                writer.writerow(row)
+                sys.stdout.flush()
+        else:
+            for filepath, algorithm, _, rank, _ in rows:
+                print("{} - {} : {}".format(filepath, algorithm, rank))
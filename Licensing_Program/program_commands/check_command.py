@@ -1,24 +1,35 @@
 """Submodule for 'check' command functionality.
 """
 
+import os
+
+import config_handling
 import userfiles_handling
 
 
 def main(args, config):
     """'check' command entrypoint.
     """
+    userproject_dir = os.curdir
+
     if args.files:
         args.files = set(
-            userfile_handling.sanitize_path(path, userproject_dir)
+            userfiles_handling.sanitize_path(path, userproject_dir)
             for path in args.files
         )
-    else:
-        args.files = userfile_handling.userfiles_iter(userproject_dir)
 
-    if not args.no_ignore:
-        args.files = userfiles_handling.remove_ignored_userfiles(
-            args.files,
-            config,
+        if not args.no_ignore:
+            args.files = userfiles_handling.remove_ignored_userfiles(
+                args.files,
+                config,
+            )
+    else:
+        # ignored trees are pruned by the walk, never listed
+        args.files = userfiles_handling.userfile_iter(
+            userproject_dir,
+            None if args.no_ignore
+            else config_handling.ignore_matcher(config),
+            threads=args.threads,
         )
 
     commentfmt_userfiles_pairing = \
@@ -1,11 +1,10 @@
 """Submodule for 'write' command functionality.
 """
 
-import difflib
-import itertools
-
 import licenses
 import userfiles_handling
+import utils.header_region as header_region
+import utils.ranking.windows as windows
 
 
 def main(args, config):
@@ -17,7 +16,11 @@ def main(args, config):
     if args.headers_only:
         for userfile_path in args.headers_only:
             print(userfile_path)
-            print(list(rank_license_text(userfile_path, config)))
+            print(list(rank_license_text(
+                userfile_path,
+                config,
+                args.ranking_algorithm,
+            )))
     else:
         pass
 
@@ -67,62 +70,64 @@ def create_header(license_name, commentfmt, config):
     return "".join(header_lines)
 
 
-def rank_license_text(userfile_path, config):
+def rank_license_text(userfile_path, config,
+                      algorithm="ratcliff-obershelp"):
     """Returns a list of licenses sorted based on their percentage chance of
-    matching the current header in the userfile.
+    matching the current header in the userfile. `algorithm` is a key of
+    `utils.ranking.algorithm_dict`.
     """
-    header_start_line = userfiles_handling.find_header_start_line(userfile_path)
+    # block comments add at most one closing line to a header
+    userfile_region = header_region.read_header_region(
+        userfile_path,
+        userfiles_handling.HEADER_IN_FIRST_N_LINES
+        + max(
+            len(license.header.splitlines()) + 1
+            for license in licenses.license_dict.values()
+        ),
+    )
+
+    header_start_line = userfiles_handling.find_header_start_in_lines(
+        userfile_region
+    )
 
     if header_start_line is not None:
-        with open(userfile_path, "rt") as userfile:
-            commentfmt = userfiles_handling.commentfmt_userfile(
-                userfile_path,
+        commentfmt = userfiles_handling.commentfmt_userfile(
+            userfile_path,
+            config,
+        )
+
+        userfile_header_lines = userfile_region[header_start_line - 1:]
+
+        corpus = []
+        for license_name in licenses.license_dict.keys():
+            commented_header = create_header(
+                license_name,
+                commentfmt,
                 config,
             )
 
-            userfile_header_iter = iter(
-                line
-                for index, line in enumerate(userfile, 1)
-                if index >= header_start_line
+            corpus.append(
+                windows.LicenseSample(
+                    name=license_name,
+                    text=commented_header,
+                    line_count=len(commented_header.splitlines()),
+                    rank_exponent=1,
+                )
             )
 
-            userfile_header_license_pair = zip(
-                licenses.license_dict.keys(),
-                itertools.tee(userfile_header_iter,
-                              len(licenses.license_dict.keys())),
-            )
-
-            def _license_sequence_matcher_gen():
-                for license_name, userfile_header_iter in \
-                    userfile_header_license_pair:
-
-                    commented_header = license_handling.create_header(
-                        license_name,
-                        commentfmt,
-                        config,
-                    )
-
-                    yield (
-                        license_name,
-                        difflib.SequenceMatcher(
-                            a=commented_header,
-                            b="".join(
-                                itertools.islice(
-                                    userfile_header_iter,
-                                    len(commented_header.splitlines())
-                                )
-                            ),
-                        ),
-                    )
-
-            def _snd_ratio_call(pair):
-                return (pair[0], pair[1].ratio())
-
-            return sorted(
-                map(_snd_ratio_call, _license_sequence_matcher_gen()),
-                key=lambda x: x[1],
-                reverse=True,
-            )
+        return sorted(
+            (
+                (license_name, diff_rank)
+                for _, diff_rank, _, license_name in windows.rank_windows(
+                    windows.HeaderWindows(userfile_header_lines),
+                    corpus,
+                    1,
+                    [algorithm],
+                )[algorithm]
+            ),
+            key=lambda x: x[1],
+            reverse=True,
+        )
 
     else:
         return []
@@ -0,0 +1,90 @@
+import os
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+
+import utils.filepaths_gen as filepaths_gen
+
+TREE_FILES = [
+    "top.txt",
+    ".hidden_file",
+    ".hidden_dir/inside.txt",
+    "a/one.f90",
+    "a/two.c",
+    "a/b/three.h",
+    "a/b/c/four.py",
+    "a/b/c/.hidden_nested",
+    "d/five.txt",
+    "d/e/six.txt",
+]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for relpath in TREE_FILES:
+        path = tmp_path / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relpath + "\n")
+
+    (tmp_path / "empty").mkdir()
+    # neither walk follows a link to a directory, a link to a file is a file
+    os.symlink(str(tmp_path / "a"), str(tmp_path / "d" / "link_to_a"))
+    os.symlink(str(tmp_path / "top.txt"), str(tmp_path / "a" / "link_to_top"))
+
+    return tmp_path
+
+
+def _os_walk_relpaths(top_dir, include_hidden):
+    """The relative paths of `os.walk`, top down with every directory's
+    entries sorted by name.
+    """
+    for cwd, dirs, files in os.walk(str(top_dir)):
+        dirs.sort()
+
+        if not include_hidden:
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+
+        for name in sorted(files):
+            if include_hidden or not name.startswith("."):
+                yield pathlib.Path(cwd, name).relative_to(top_dir).as_posix()
+
+
+def _serial(top_dir, include_hidden):
+    return filepaths_gen.relpaths_gen(top_dir, include_hidden)
+
+
+def _parallel(top_dir, include_hidden):
+    return filepaths_gen.parallel_relpaths_gen(
+        top_dir, include_hidden, threads=4,
+    )
+
+
+def _parallel_sorted(top_dir, include_hidden):
+    return filepaths_gen.parallel_relpaths_gen(
+        top_dir, include_hidden, threads=4, sort=True,
+    )
+
+
+@pytest.mark.parametrize("include_hidden", [False, True])
+@pytest.mark.parametrize("walker", [_serial, _parallel, _parallel_sorted])
+def test_walkers_match_os_walk(tree, walker, include_hidden):
+    relpaths = list(walker(tree, include_hidden))
+
+    assert sorted(relpaths) == sorted(_os_walk_relpaths(tree, include_hidden))
+    assert len(relpaths) == len(set(relpaths))
+
+
+@pytest.mark.parametrize("include_hidden", [False, True])
+def test_parallel_sorted_is_deterministic(tree, include_hidden):
+    expected = list(_os_walk_relpaths(tree, include_hidden))
+
+    for threads in [1, 2, 4, 8]:
+        for _ in range(5):
+            assert list(
+                filepaths_gen.parallel_relpaths_gen(
+                    tree, include_hidden, threads=threads, sort=True,
+                )
+            ) == expected
@@ -0,0 +1,117 @@
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+sys.path.insert(
+    0,
+    str(pathlib.Path(__file__).absolute().parent.parent / "copyright_ranking"),
+)
+
+import manual_classification
+
+GPL_HEADER = [
+    "!=====================================================================\n",
+    "!\n",
+    "!  Copyright (C) {year} the SPECFEM3D development team\n",
+    "!\n",
+    "!  This program is free software; you can redistribute it and/or\n",
+    "!  modify it under the terms of the GNU General Public License as\n",
+    "!  published by the Free Software Foundation; either version 3 of the\n",
+    "!  License, or (at your option) any later version.\n",
+    "!\n",
+    "!=====================================================================\n",
+    "\n",
+]
+
+C_GPL_HEADER = [
+    "/*\n",
+    " * Copyright (C) {year} the SPECFEM3D development team\n",
+    " *\n",
+    " * This program is free software; you can redistribute it and/or\n",
+    " * modify it under the terms of the GNU General Public License as\n",
+    " * published by the Free Software Foundation; either version 3 of the\n",
+    " * License, or (at your option) any later version.\n",
+    " */\n",
+    "#include <stdio.h>\n",
+]
+
+
+def _write(path, header, year, code):
+    path.write_text(
+        "".join(line.format(year=year) for line in header) + code
+    )
+    return path
+
+
+def test_same_header_different_code(tmp_path):
+    paths = [
+        _write(
+            tmp_path / "{}.f90".format(name),
+            GPL_HEADER,
+            year,
+            "subroutine {}()\n  call {}_inner()\nend subroutine\n".format(
+                name, name
+            ) * 8,
+        )
+        for name, year in [("one", 2010), ("two", 2015), ("three", 2020)]
+    ]
+
+    assert manual_classification.cluster_userfiles(paths) == [paths]
+
+
+def test_block_comment_header_before_directives(tmp_path):
+    paths = [
+        _write(tmp_path / "one.c", C_GPL_HEADER, 2012, "int one;\n"),
+        _write(tmp_path / "two.c", C_GPL_HEADER, 2013, "void two(void);\n"),
+    ]
+
+    assert manual_classification.cluster_userfiles(paths) == [paths]
+
+
+def test_different_headers(tmp_path):
+    gpl_path = _write(tmp_path / "gpl.f90", GPL_HEADER, 2010, "end\n")
+    other_path = _write(
+        tmp_path / "other.f90",
+        ["! Copyright (C) {year} someone else, all rights reserved\n"],
+        2010,
+        "end\n",
+    )
+
+    assert sorted(
+        map(len, manual_classification.cluster_userfiles(
+            [gpl_path, other_path]
+        ))
+    ) == [1, 1]
+
+
+def test_files_without_header_stay_apart(tmp_path):
+    paths = [
+        _write(tmp_path / "{}.f90".format(name), [], 0, "end\n")
+        for name in ["one", "two"]
+    ]
+
+    assert len(manual_classification.cluster_userfiles(paths)) == 2
+
+
+def test_hash_comments_before_directives():
+    assert manual_classification.header_block([
+        "#!/usr/bin/env python\n",
+        "#Copyright (C) 2010 the SPECFEM3D development team\n",
+        "#\n",
+        "#include <stdio.h>\n",
+    ]) == [
+        "#!/usr/bin/env python\n",
+        "#Copyright (C) 2010 the SPECFEM3D development team\n",
+        "#\n",
+    ]
+
+
+def test_fortran_c_comments_in_column_one():
+    assert manual_classification.header_block([
+        "C  Copyright (C) 2010 the SPECFEM3D development team\n",
+        "c\n",
+        "      c = a + b\n",
+    ]) == [
+        "C  Copyright (C) 2010 the SPECFEM3D development team\n",
+        "c\n",
+    ]
@@ -1,3 +1,12 @@
+import pathlib
+import re
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+
+import config_handling
+import userfiles_handling
+
 patterns = [
     "one/**/*",
     "one/**/two/*",
@@ -16,3 +25,114 @@ tests = [
     "two/zero.txt",
     "zero.txt",
 ]
+
+
+def test_compiled_matcher_matches_each_pattern():
+    for pattern in patterns:
+        file_regex = config_handling.compile_ignoredfiles(
+            (pattern,)
+        ).file_regex
+
+        for test in tests:
+            assert bool(file_regex.match(test)) == bool(
+                re.match(
+                    config_handling.param_ignoredfiles_to_regex(pattern),
+                    test,
+                )
+            )
+
+
+def test_compiled_matcher_is_union_of_patterns():
+    file_regex = config_handling.compile_ignoredfiles(
+        tuple(patterns[:3])
+    ).file_regex
+
+    assert [test for test in tests if file_regex.match(test)] == [
+        test
+        for test in tests
+        if any(
+            re.match(config_handling.param_ignoredfiles_to_regex(pattern),
+                     test)
+            for pattern in patterns[:3]
+        )
+    ]
+
+
+def test_empty_matcher_ignores_nothing():
+    matcher = config_handling.compile_ignoredfiles(())
+
+    assert not any(matcher.file_regex.match(test) for test in tests)
+    assert not matcher.dir_regex.match("one")
+
+
+def test_prefixes_are_sliced_not_stripped():
+    assert config_handling.param_ignoredfiles_to_regex("re:readme") \
+        == "readme"
+    assert config_handling.param_ignoredfiles_to_regex("ant:tests/**") \
+        == config_handling.antpattern_to_regex("tests/**")
+    assert config_handling.param_ignoredfiles_to_regex("ant:aa/**") \
+        == config_handling.antpattern_to_regex("aa/**")
+
+
+def test_dir_regex():
+    def _dir_matches(pattern, dirpath):
+        return bool(
+            re.match(
+                config_handling.param_ignoredfiles_to_dir_regex(pattern),
+                dirpath,
+            )
+        )
+
+    assert _dir_matches(".git/**", ".git")
+    assert not _dir_matches(".git/**", "one/.git")
+    assert not _dir_matches(".git/**", ".github")
+    assert _dir_matches("**/build/**", "build")
+    assert _dir_matches("**/build/**", "one/two/build")
+    assert not _dir_matches("**/build/**", "one/build/two")
+    assert _dir_matches("ant:one/*/tmp/**", "one/two/tmp")
+
+    for pattern in ["re:one/.*", "one/**/*", "*.o", "**", "/**"]:
+        assert config_handling.param_ignoredfiles_to_dir_regex(pattern) \
+            is None
+
+
+def test_ignored_dirs_hold_only_ignored_files():
+    for pattern in [".git/**", "**/build/**", "one/*/tmp/**", "one/**"]:
+        matcher = config_handling.compile_ignoredfiles((pattern,))
+
+        for dirpath in ["one", ".git", "build", "one/two/build",
+                        "one/two/tmp", "two"]:
+            if matcher.dir_regex.match(dirpath):
+                for name in ["zero.txt", "nan/zero.txt", ".hidden"]:
+                    assert matcher.file_regex.match(dirpath + "/" + name)
+
+
+def test_walk_prunes_ignored_dirs(tmp_path, monkeypatch):
+    for relpath in ["zero.txt", ".git/HEAD", ".git/objects/zero",
+                    "one/build/zero.o", "one/zero.txt"]:
+        path = tmp_path / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+    scanned = []
+    scandir = userfiles_handling.filepaths_gen.os.scandir
+
+    def _scandir(path):
+        scanned.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(
+        userfiles_handling.filepaths_gen.os,
+        "scandir",
+        _scandir,
+    )
+
+    assert sorted(
+        userfiles_handling.userfile_iter(
+            str(tmp_path),
+            config_handling.ignore_matcher(
+                {"IgnoredFiles": [".git/**", "**/build/**"]}
+            ),
+        )
+    ) == ["one/zero.txt", "zero.txt"]
+    assert sorted(scanned) == [str(tmp_path), str(tmp_path / "one")]
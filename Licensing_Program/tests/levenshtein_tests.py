@@ -0,0 +1,73 @@
+import pathlib
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+
+levenshtein = pytest.importorskip("utils.ranking.levenshtein")
+
+
+def _lcs_length(a, b):
+    """Longest common subsequence length by the textbook dynamic program.
+    """
+    row = [0] * (len(b) + 1)
+
+    for a_char in a:
+        diagonal = 0
+
+        for index, b_char in enumerate(b, 1):
+            diagonal, row[index] = row[index], (
+                diagonal + 1 if a_char == b_char
+                else max(row[index], row[index - 1])
+            )
+
+    return row[-1]
+
+
+def _check_lcs_lengths(window_texts, text):
+    lanes = levenshtein._WindowLanes(window_texts)
+
+    assert levenshtein.lcs_lengths(lanes, text).tolist() == [
+        _lcs_length(text, window_text) for window_text in window_texts
+    ]
+
+
+@pytest.mark.parametrize("window_texts, text", [
+    ([""], ""),
+    ([""], "abc"),
+    (["abc"], ""),
+    (["", "a", ""], "a"),
+    (["a"], "a"),
+    (["a"], "b"),
+    (["a", "b", "ab", "ba"], "ab"),
+    (["aaaa", "a"], "aaaaaaaa"),
+    # windows longer than a 64 bit machine word
+    (["abcdefgh" * 20, "hgfedcba" * 17, "x" * 65], "abcdefgh" * 19 + "x"),
+    # non-ASCII characters, outside the basic multilingual plane too
+    (["Copyright © 2017 Ünïcödé", "日本語テキスト", "𝄞𝄞 music"],
+     "Copyright (C) 2017 Unicode 日本 𝄞"),
+])
+def test_lcs_lengths_edge_cases(window_texts, text):
+    _check_lcs_lengths(window_texts, text)
+
+
+def test_lcs_lengths_random():
+    rng = random.Random(0)
+
+    for alphabet in ["ab", "abcd", "abcdefghijklmnopqrstuvwxyz \n",
+                     "aéü€日𝄞"]:
+        for _ in range(50):
+            window_texts = [
+                "".join(
+                    rng.choice(alphabet)
+                    for _ in range(rng.randrange(0, 150))
+                )
+                for _ in range(rng.randrange(1, 6))
+            ]
+            text = "".join(
+                rng.choice(alphabet) for _ in range(rng.randrange(0, 150))
+            )
+
+            _check_lcs_lengths(window_texts, text)
@@ -0,0 +1,92 @@
+import pathlib
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+sys.path.insert(
+    0,
+    str(pathlib.Path(__file__).absolute().parent.parent / "copyright_ranking"),
+)
+
+import copyright_ranking
+import utils.ranking
+import utils.ranking.windows as windows
+
+LINES_CHECKED = 32
+
+CORPUS = copyright_ranking.load_license_corpus(
+    sorted(
+        pathlib.Path(copyright_ranking.__file__).parent.glob(
+            "license_samples/*.header"
+        )
+    )
+)
+
+
+def _unpruned_ranks(header_windows, algorithm, rank_min):
+    """The ranks of `windows.rank_windows`, with every license/window pair
+    computed.
+    """
+    best = {}
+
+    for license in CORPUS:
+        for lineno, _, diff_rank in utils.ranking.algorithm_dict[
+            algorithm
+        ].window_ratios(
+            header_windows,
+            [license],
+            license.line_count,
+            LINES_CHECKED,
+            lambda *_: True,
+        ):
+            if license.name not in best or diff_rank > best[license.name][0]:
+                best[license.name] = (diff_rank, lineno + 1)
+
+    return [
+        (
+            best[license.name][0] ** license.rank_exponent,
+            best[license.name][0],
+            best[license.name][1],
+            license.name,
+        )
+        for license in CORPUS
+        if license.name in best
+        and best[license.name][0] ** license.rank_exponent >= rank_min
+    ]
+
+
+def _header_regions():
+    rng = random.Random(0)
+    max_lines = LINES_CHECKED + max(license.line_count for license in CORPUS)
+    code = ["      program main\n", "      call run()\n", "      end\n"]
+
+    for license in CORPUS[::4]:
+        lines = license.text.splitlines(keepends=True)
+
+        # a commented, slightly edited header after a few lines of code
+        edited = [
+            "! " + line.replace("the", "teh") if rng.random() < 0.2
+            else "! " + line
+            for line in lines
+        ]
+        yield (code[:rng.randrange(4)] + edited + code * 10)[:max_lines]
+
+    yield code * 20
+    yield []
+
+
+@pytest.mark.parametrize("rank_min", [0.0, 0.2])
+@pytest.mark.parametrize("algorithm", sorted(utils.ranking.algorithm_dict))
+def test_pruning_keeps_ranks(algorithm, rank_min):
+    for lines in _header_regions():
+        header_windows = windows.HeaderWindows(lines)
+
+        assert windows.rank_windows(
+            header_windows,
+            CORPUS,
+            LINES_CHECKED,
+            [algorithm],
+            rank_min,
+        )[algorithm] == _unpruned_ranks(header_windows, algorithm, rank_min)
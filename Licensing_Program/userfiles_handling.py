@@ -10,20 +10,32 @@ import tempfile
 HEADER_IN_FIRST_N_LINES = 20
 HEADER_SIGNAL_STRING = "Copyright"
 
+import config_handling
 import license_handling
+import licenses
+import utils.filepaths_gen as filepaths_gen
+import utils.header_region as header_region
+
+
+def find_header_start_in_lines(lines):
+    """Find line number of the line in `lines` that holds the token string
+    that signals the start of the license header.
+    """
+    fileslice = itertools.islice(lines, HEADER_IN_FIRST_N_LINES)
+    for linenum, line in enumerate(fileslice, 1):
+        if HEADER_SIGNAL_STRING.casefold() in line.casefold():
+            return linenum
+
+    return None
 
 
 def find_header_start_line(path):
     """Find line number of line that holds the token string that signals the
     start of the license header.
     """
-    with open(path, "rt") as ro_file:
-        fileslice = itertools.islice(ro_file, HEADER_IN_FIRST_N_LINES)
-        for linenum, line in enumerate(fileslice, 1):
-            if HEADER_SIGNAL_STRING.casefold() in line.casefold():
-                return linenum
-
-    return None
+    return find_header_start_in_lines(
+        header_region.read_header_region(path, HEADER_IN_FIRST_N_LINES)
+    )
 
 
 def _compare_header_lines(correct_lines, test_lines):
@@ -40,8 +52,15 @@ def _compare_header_lines(correct_lines, test_lines):
 def file_has_correct_header(user_filepath, args, config):
     """Return true if file designated by `path` has the correct header.
     """
+    # block comments add at most one closing line to a header
     try:
-        linenum = find_header_start_line(user_filepath)
+        user_file_region = header_region.read_header_region(
+            user_filepath,
+            HEADER_IN_FIRST_N_LINES
+            + len(licenses.license_dict[config["License"]].header
+                  .splitlines())
+            + 1,
+        )
     except UnicodeDecodeError:
         if args.info_level == "verbose":
             print(
@@ -52,39 +71,33 @@ def file_has_correct_header(user_filepath, args, config):
 
         return False
 
+    linenum = find_header_start_in_lines(user_file_region)
+
     if linenum is not None:
-        with open(user_filepath, "rt") as user_file:
-            header_text = license_handling.fill_in_license(
-                config["License"], config,
-            )["header_text"]
+        # the expected header is only built for files that have one
+        header_text = license_handling.fill_in_license(
+            config["License"], config,
+        )["header_text"]
 
-            header_text, comment_format = license_handling.comment_out_header(
-                header_text, user_filepath, args, config,
-            )
+        header_text, comment_format = license_handling.comment_out_header(
+            header_text, user_filepath, args, config,
+        )
 
-            header_lines = header_text.splitlines(keepends=True)
+        header_lines = header_text.splitlines(keepends=True)
+        user_file_lines = user_file_region[linenum:linenum + len(header_lines)]
 
-            user_file_lines = [
-                line
-                for line in itertools.islice(
-                    user_file,
-                    linenum,
-                    linenum + len(header_lines),
-                )
-            ]
+        mismatched_lines = _compare_header_lines(
+            header_lines, user_file_lines
+        )
 
-            mismatched_lines = _compare_header_lines(
-                header_lines, user_file_lines
+        if args.info_level == "verbose" and mismatched_lines:
+            print(
+                ("In file {}: there are {} lines that do not match the"
+                 " expected license header.").format(user_filepath,
+                                                     mismatched_lines)
             )
 
-            if args.info_level == "verbose" and mismatched_lines:
-                print(
-                    ("In file {}: there are {} lines that do not match the"
-                     " expected license header.").format(user_filepath,
-                                                         mismatched_lines)
-                )
-
-            return not bool(mismatched_lines)
+        return not bool(mismatched_lines)
 
     else:
         if args.info_level == "verbose":
@@ -148,26 +161,37 @@ def sanitize_path(path, cwd):
         ValueError("{} is not in provided cwd: {}".format(path, cwd))
 
 
-def userfile_iter(userproject_dir):
+def userfile_iter(userproject_dir, ignore_matcher=None, threads=0):
     """Returns an iterator of relative file paths of all user project files.
+    With a `config_handling.IgnoreMatcher`, ignored files are left out and
+    directories holding only ignored files are never walked. A `threads`
+    other than 0 scans directories concurrently with that many threads, or
+    the thread pool default for `None`.
     """
-    return iter(
-        sanitize_path(os.path.join(cwd, file), userproject_dir)
-        for cwd, dirs, files in os.walk(userproject_dir)
-        for file in files
-    )
+    if threads == 0:
+        return filepaths_gen.relpaths_gen(
+            userproject_dir,
+            include_hidden=True,
+            ignore_matcher=ignore_matcher,
+        )
+    else:
+        return filepaths_gen.parallel_relpaths_gen(
+            userproject_dir,
+            include_hidden=True,
+            ignore_matcher=ignore_matcher,
+            threads=threads,
+        )
 
 
 def remove_ignored_userfiles(userfile_paths, config):
     """Returns an iterator of filepaths with ignored files filtered out.
     """
+    file_regex = config_handling.ignore_matcher(config).file_regex
+
     return iter(
         userfile_path
         for userfile_path in userfile_paths
-        if not any(
-            re.match(ignore_pattern, userfile_path)
-            for ignore_pattern in config["IgnoredFiles"]
-        )
+        if not file_regex.match(userfile_path)
     )
 
 
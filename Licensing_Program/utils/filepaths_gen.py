@@ -1,47 +1,214 @@
-"""Exports `filepaths_gen` function.
+"""Exports `relpaths_gen`, `parallel_relpaths_gen` and `filepaths_gen`
+functions.
 """
 
+import concurrent.futures
 import os
 import pathlib
 
 
-def _is_hidden_path(path: pathlib.PurePath) -> bool:
-    """Returns `True` if `path` is a hidden file or directory.
+# directory scans queued ahead of the consumer per `parallel_relpaths_gen`
+# thread, bounding the listings held in memory
+_SCANS_PER_THREAD = 4
+
+
+def _ignore_matches(ignore_matcher):
+    """Returns the directory and file `match` functions of an
+    `IgnoreMatcher`, or `None`s without one.
+    """
+    if ignore_matcher is not None:
+        return (
+            ignore_matcher.dir_regex.match,
+            ignore_matcher.file_regex.match,
+        )
+    else:
+        return None, None
+
+
+def _scan_dir(dir_path, prefix, include_hidden, dir_match, file_match,
+              sort=False):
+    """Returns a list of `(relative path, os.DirEntry)` pairs of the files of
+    a directory and a list of `(path, relative path prefix)` pairs of its
+    sub directories to walk, in scan order or sorted by name. An unreadable
+    directory has neither.
     """
-    def _is_hidden_basename(basename):
-        return basename.startswith(os.extsep)
+    try:
+        with os.scandir(dir_path) as scandir_it:
+            entries = list(scandir_it)
+    except OSError:
+        return [], []
+
+    if sort:
+        entries.sort(key=lambda entry: entry.name)
+
+    files = []
+    subdirs = []
 
-    return any(_is_hidden_basename(part) for part in path.parts)
+    for entry in entries:
+        if not include_hidden and entry.name.startswith(os.extsep):
+            continue
 
+        relpath = prefix + entry.name
 
-def _is_visible_path(path: pathlib.PurePath) -> bool:
-    """Returns `False` if `path` is a hidden file or directory.
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+
+        if is_dir:
+            if ((dir_match is None or not dir_match(relpath))
+                    and not entry.is_symlink()):
+                subdirs.append((entry.path, relpath + "/"))
+        elif file_match is None or not file_match(relpath):
+            files.append((relpath, entry))
+
+    return files, subdirs
+
+
+def relpaths_gen(top_dir, include_hidden=False, ignore_matcher=None,
+                 with_entries=False):
+    """Generator of POSIX path strings relative to `top_dir` of the files in
+    `top_dir` and sub directories, walked with `os.scandir`. If
+    `include_hidden` is `False`, hidden files and hidden directories are
+    left out. With a `config_handling.IgnoreMatcher`, ignored files are left
+    out and directories holding only ignored files are never scanned. If
+    `with_entries` is `True`, `(path, os.DirEntry)` pairs are generated, to
+    reuse the file type and stat data of the scan.
+
+    Like `os.walk`, the walk is top down, the files of a directory come
+    before those of its sub directories, symbolic links to directories
+    aren't followed and unreadable directories are skipped.
     """
-    return not _is_hidden_path(path)
+    dir_match, file_match = _ignore_matches(ignore_matcher)
+
+    # stack of `(directory path, relative path prefix)` pairs to scan
+    pending = [(os.fspath(top_dir), "")]
+
+    while pending:
+        files, subdirs = _scan_dir(
+            *pending.pop(),
+            include_hidden,
+            dir_match,
+            file_match,
+        )
 
+        if with_entries:
+            yield from files
+        else:
+            for relpath, _ in files:
+                yield relpath
 
-def _os_walk_filter(filter_func, top_dir):
-    """Generator for filtered `os.walk` concrete paths. `filter_func` must
-    accept a `pathlib.PurePath` relative to `top_dir`.
+        # popped in scan order
+        subdirs.reverse()
+        pending.extend(subdirs)
+
+
+def parallel_relpaths_gen(top_dir, include_hidden=False, ignore_matcher=None,
+                          with_entries=False, threads=None, sort=False):
+    """Generator of the paths of `relpaths_gen`, with sibling directories
+    scanned concurrently by a pool of `threads` threads, for file systems
+    where every directory listing is a slow round trip, such as NFS. `None`
+    uses the `concurrent.futures.ThreadPoolExecutor` default. Paths are
+    generated as the scans complete, with at most `_SCANS_PER_THREAD` scans
+    per thread queued ahead of the consumer.
+
+    The files of a directory are generated together, directories in the
+    order their scans complete. If `sort` is `True`, the walk order is the
+    one of `relpaths_gen` with every directory's entries sorted by name,
+    so the paths are the same from one run to the next.
     """
-    for cwd, dirs, files in os.walk(top_dir):
-        for dirname in dirs:
-            if not filter_func(
-                    pathlib.PurePosixPath(cwd, dirname).relative_to(top_dir)):
-                dirs.remove(dirname)
+    dir_match, file_match = _ignore_matches(ignore_matcher)
+
+    if threads is None:
+        threads = min(32, (os.cpu_count() or 1) + 4)
+
+    max_scans = threads * _SCANS_PER_THREAD
+    executor = concurrent.futures.ThreadPoolExecutor(threads)
+
+    def _submit_scan(dir_path, prefix):
+        return executor.submit(
+            _scan_dir,
+            dir_path,
+            prefix,
+            include_hidden,
+            dir_match,
+            file_match,
+            sort,
+        )
+
+    def _scanned_dirs_sorted():
+        # `[directory path, relative path prefix, scan future]` stack, the
+        # top `max_scans` directories next in walk order being scanned
+        pending = [[os.fspath(top_dir), "", None]]
+
+        try:
+            while pending:
+                for scan in pending[-max_scans:]:
+                    if scan[2] is None:
+                        scan[2] = _submit_scan(scan[0], scan[1])
 
-        for filename in files:
-            path = pathlib.PurePosixPath(cwd, filename).relative_to(top_dir)
-            if filter_func(path):
-                yield pathlib.Path(path)
+                files, subdirs = pending.pop()[2].result()
+                yield files
 
+                pending.extend(
+                    [dir_path, prefix, None]
+                    for dir_path, prefix in reversed(subdirs)
+                )
+        finally:
+            for _, _, future in pending:
+                if future is not None:
+                    future.cancel()
 
-def filepaths_gen(top_dir, include_hidden=False):
+    def _scanned_dirs_unordered():
+        # directories to scan once fewer than `max_scans` are being scanned
+        unscanned = [(os.fspath(top_dir), "")]
+        scanning = set()
+
+        try:
+            while unscanned or scanning:
+                while unscanned and len(scanning) < max_scans:
+                    scanning.add(_submit_scan(*unscanned.pop()))
+
+                done, scanning = concurrent.futures.wait(
+                    scanning,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    files, subdirs = future.result()
+                    unscanned.extend(subdirs)
+                    yield files
+        finally:
+            for future in scanning:
+                future.cancel()
+
+    try:
+        for files in (_scanned_dirs_sorted() if sort
+                      else _scanned_dirs_unordered()):
+            if with_entries:
+                yield from files
+            else:
+                for relpath, _ in files:
+                    yield relpath
+    finally:
+        executor.shutdown(wait=False)
+
+
+def filepaths_gen(top_dir, include_hidden=False, threads=0, sort=False):
     """Generator of `pathlib.Path`s for files in `top_dir` and sub directores.
     If `include_hidden` is `False`, the generator will not include hidden files
     or files in hidden directories. All `Path`s will be relative to `top_dir`.
+    A `threads` other than 0 walks with `parallel_relpaths_gen`.
     """
-    if not include_hidden:
-        return _os_walk_filter(_is_visible_path, top_dir)
+    if threads == 0:
+        relpaths = relpaths_gen(top_dir, include_hidden)
     else:
-        return _os_walk_filter(lambda _: True, top_dir)
+        relpaths = parallel_relpaths_gen(
+            top_dir,
+            include_hidden,
+            threads=threads,
+            sort=sort,
+        )
+
+    for relpath in relpaths:
+        yield pathlib.Path(relpath)
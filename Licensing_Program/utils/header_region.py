@@ -0,0 +1,13 @@
+"""Exports `read_header_region` function.
+"""
+
+import itertools
+
+
+def read_header_region(path, max_lines):
+    """Returns a list of at most the first `max_lines` lines of the file at
+    `path`. The file is opened once and never read past its header region.
+    Raises `UnicodeDecodeError` if the region is not standard text.
+    """
+    with open(str(path), "rt") as userfile:
+        return list(itertools.islice(userfile, max_lines))
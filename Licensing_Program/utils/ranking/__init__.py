@@ -0,0 +1,25 @@
+"""Submodule for ranking how closely a file's header matches license texts.
+Every ranking algorithm is a module exporting a `window_ratios` generator;
+`algorithm_dict` keys are the algorithm names used in the
+`ranking_algorithms` table of the copyright_ranking database.
+"""
+
+import utils.ranking.line_hash as line_hash
+import utils.ranking.ratcliff_obershelp as ratcliff_obershelp
+import utils.ranking.token_jaccard as token_jaccard
+
+try:
+    import utils.ranking.levenshtein as levenshtein
+except ImportError:
+    levenshtein = None
+
+
+algorithm_dict = {
+    "line-hash" : line_hash,
+    "ratcliff-obershelp" : ratcliff_obershelp,
+    "token-jaccard" : token_jaccard,
+}
+
+# the levenshtein algorithm needs the 'numpy' module
+if levenshtein:
+    algorithm_dict["levenshtein"] = levenshtein
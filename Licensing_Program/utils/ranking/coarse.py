@@ -0,0 +1,85 @@
+"""Coarse license ranking stage. Exports `CoarseIndex` class.
+
+Texts are turned into vectors of hashed word n-gram counts, and every
+license is scored against a file's header region by cosine similarity with a
+single matrix product. Only the best scoring licenses are then passed to the
+expensive windowed ranking.
+"""
+
+import heapq
+import re
+import zlib
+
+import numpy
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def ngram_vector(text, ngram_length=2, buckets=4096):
+    """Returns the vector of hashed word n-gram counts of `text`. Words are
+    casefolded and n-grams are hashed with CRC-32, so vectors are the same in
+    every process.
+    """
+    words = _WORD_RE.findall(text.casefold())
+    ngrams = (
+        " ".join(words[index:index + ngram_length])
+        for index in range(max(len(words) - ngram_length + 1, 0))
+    )
+
+    return numpy.bincount(
+        numpy.fromiter(
+            (zlib.crc32(ngram.encode()) % buckets for ngram in ngrams),
+            dtype=numpy.int64,
+        ),
+        minlength=buckets,
+    ).astype(numpy.float64)
+
+
+class CoarseIndex:
+    """Unit length n-gram vectors of every license in a corpus, stacked into
+    one matrix.
+    """
+    def __init__(self, corpus, ngram_length=2, buckets=4096):
+        self.corpus = tuple(corpus)
+        self.ngram_length = ngram_length
+        self.buckets = buckets
+
+        self.matrix = numpy.array(
+            [
+                ngram_vector(license.text, ngram_length, buckets)
+                for license in self.corpus
+            ]
+        ).reshape(len(self.corpus), buckets)
+
+        norms = numpy.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= numpy.where(norms > 0, norms, 1)
+
+    def scores(self, text):
+        """Returns an array of the cosine similarity of `text` to each license
+        in the corpus.
+        """
+        vector = ngram_vector(text, self.ngram_length, self.buckets)
+        norm = numpy.linalg.norm(vector)
+
+        return self.matrix @ (vector / norm if norm > 0 else vector)
+
+    def top_licenses(self, text, k):
+        """Returns the `k` licenses of the corpus most similar to `text`, in
+        corpus order. A `k` of `None` returns the whole corpus.
+        """
+        if k is None or k >= len(self.corpus):
+            return self.corpus
+
+        top_indices = set(
+            heapq.nlargest(
+                k,
+                range(len(self.corpus)),
+                key=self.scores(text).__getitem__,
+            )
+        )
+
+        return tuple(
+            license
+            for index, license in enumerate(self.corpus)
+            if index in top_indices
+        )
@@ -0,0 +1,133 @@
+"""Levenshtein license ranking. Exports `window_ratios` function.
+
+The ratio is the indel (insertion and deletion) Levenshtein ratio used by
+python-Levenshtein's `ratio`: `1 - distance / (len(a) + len(b))`, which is
+`2 * LCS / (len(a) + len(b))`. The longest common subsequence is computed
+with the bit-parallel algorithm of Allison-Dix and Hyyro, in the style of
+Myers' algorithm.
+
+All windows of a file are packed side by side as lanes of one Python
+integer, each lane followed by a zero guard bit that absorbs the lane's
+carry. A license is then run once over every window offset at the same
+time; NumPy builds the per character match masks and counts the result bits
+of each lane.
+"""
+
+import numpy
+
+
+# no character has this code point, so guard bits never match
+_GUARD_CODE = 0xFFFFFFFF
+
+
+class _WindowLanes:
+    """Bit lanes of the windows starting at each line offset, one bit per
+    window character.
+    """
+    def __init__(self, window_texts):
+        self.lengths = numpy.array(
+            [len(text) for text in window_texts],
+            dtype=numpy.int64,
+        )
+        self.starts = numpy.concatenate(
+            ([0], numpy.cumsum(self.lengths + 1)[:-1])
+        )
+        self.bit_count = int(numpy.sum(self.lengths + 1))
+
+        is_char = numpy.ones(self.bit_count, dtype=bool)
+        is_char[self.starts + self.lengths] = False
+
+        self.codes = numpy.full(self.bit_count, _GUARD_CODE, numpy.uint32)
+        self.codes[is_char] = numpy.frombuffer(
+            "".join(window_texts).encode("utf-32-le"),
+            dtype=numpy.uint32,
+        )
+
+        self.lane_mask = self._to_int(is_char)
+        self._match_masks = {}
+
+    @staticmethod
+    def _to_int(bits):
+        return int.from_bytes(
+            numpy.packbits(bits, bitorder="little").tobytes(),
+            "little",
+        )
+
+    def match_mask(self, char):
+        """Returns the integer with the bits of every window character equal
+        to `char` set.
+        """
+        try:
+            return self._match_masks[char]
+        except KeyError:
+            mask = self._match_masks[char] = self._to_int(
+                self.codes == ord(char)
+            )
+            return mask
+
+    def lane_popcounts(self, value):
+        """Returns an array of the amount of set bits in each lane of
+        `value`.
+        """
+        bits = numpy.unpackbits(
+            numpy.frombuffer(
+                value.to_bytes((self.bit_count + 7) // 8, "little"),
+                dtype=numpy.uint8,
+            ),
+            bitorder="little",
+        )[:self.bit_count]
+
+        return numpy.add.reduceat(bits, self.starts).astype(numpy.int64)
+
+
+def lcs_lengths(lanes, text):
+    """Returns an array of the longest common subsequence lengths of `text`
+    and each window of `lanes`.
+    """
+    v = lanes.lane_mask
+
+    for char in text:
+        u = v & lanes.match_mask(char)
+
+        if u:
+            v = ((v + u) | (v - u)) & lanes.lane_mask
+
+    return lanes.lengths - lanes.lane_popcounts(v)
+
+
+def window_ratios(windows, licenses, line_count, lines_checked,
+                  worth_computing):
+    """Generator of `(lineno, license, ratio)` for each of `licenses` with
+    `line_count` lines and each window starting in the first `lines_checked`
+    lines of `windows`. `lineno` is zero-based. A license is skipped when
+    `worth_computing(license, upper_bound, pairs)` is false for the bound of
+    its best window length, since all windows are computed at once.
+    """
+    lanes = _WindowLanes(windows.window_texts(line_count, lines_checked))
+
+    for license in licenses:
+        lengths = lanes.lengths + len(license.text)
+
+        # the LCS is at most the shorter of the two texts
+        if not worth_computing(
+            license,
+            float(numpy.max(
+                numpy.where(
+                    lengths > 0,
+                    2 * numpy.minimum(lanes.lengths, len(license.text))
+                    / numpy.maximum(lengths, 1),
+                    1.0,
+                )
+            )),
+            len(lanes.lengths),
+        ):
+            continue
+
+        ratios = numpy.where(
+            lengths > 0,
+            2 * lcs_lengths(lanes, license.text) / numpy.maximum(lengths, 1),
+            1.0,
+        )
+
+        for lineno, ratio in enumerate(ratios.tolist()):
+            yield lineno, license, ratio
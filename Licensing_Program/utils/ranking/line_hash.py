@@ -0,0 +1,141 @@
+"""Line level license ranking. Exports `normalize_lines`, `ratio` and
+`window_ratios` functions.
+
+Lines are normalized (comment tokens, case and whitespace removed), so two
+headers are first compared as sequences of normalized lines. Only the runs
+of lines that differ fall back to a character level comparison.
+"""
+
+import difflib
+import functools
+import re
+
+# leading comment tokens: C/C++ (`//`, `/*`, ` * `), Fortran (`!`, `c `),
+# shell/python/make (`#`), lisp/asm (`;`), TeX/matlab (`%`), SQL/lua (`--`)
+_COMMENT_PREFIX_RE = re.compile(r"^\s*(?:[cC](?=\s)|//+|/\*+|\*+|[#!;%]+|--)")
+_COMMENT_SUFFIX_RE = re.compile(r"\*+/\s*$")
+
+
+def normalize_line(line):
+    """Returns `line` without comment tokens, case or whitespace differences.
+    """
+    line = _COMMENT_SUFFIX_RE.sub("", _COMMENT_PREFIX_RE.sub("", line))
+
+    return " ".join(line.split()).casefold()
+
+
+def normalize_lines(lines):
+    """Returns a list of the normalized text of each line in `lines`.
+    """
+    return [normalize_line(line) for line in lines]
+
+
+@functools.lru_cache(maxsize=None)
+def _license_matcher(license_text):
+    """Returns the normalized lines of `license_text` and a
+    `difflib.SequenceMatcher` with them as its cached side.
+    """
+    license_lines = normalize_lines(license_text.splitlines())
+
+    return (
+        license_lines,
+        difflib.SequenceMatcher(b=license_lines, autojunk=False),
+    )
+
+
+def _text_size(texts):
+    # every line counts its newline
+    return sum(len(text) + 1 for text in texts)
+
+
+@functools.lru_cache(maxsize=2 ** 16)
+def _line_matching_size(window_line, license_line):
+    """Returns the amount of matching characters between two lines.
+    """
+    return sum(
+        block.size
+        for block in difflib.SequenceMatcher(
+            a=window_line,
+            b=license_line,
+            autojunk=False,
+        ).get_matching_blocks()
+    )
+
+
+def ratio(window_lines, license_text):
+    """Returns a measure of the sequences' similarity in [0, 1] like
+    `difflib.SequenceMatcher.ratio`, for the normalized lines of a window and
+    a license text. Lines that differ are compared character by character
+    pairwise, but only when the window shares at least one non-empty line
+    with the license; otherwise the window is not a variant of the license
+    and is ranked by its blank lines alone.
+    """
+    license_lines, matcher = _license_matcher(license_text)
+    matcher.set_seq1(window_lines)
+    opcodes = matcher.get_opcodes()
+
+    shares_lines = any(
+        any(window_lines[i1:i2])
+        for tag, i1, i2, _, _ in opcodes
+        if tag == "equal"
+    )
+
+    matches = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            matches += _text_size(window_lines[i1:i2])
+        elif tag == "replace" and shares_lines:
+            matches += sum(
+                _line_matching_size(window_line, license_line)
+                for window_line, license_line in zip(
+                    window_lines[i1:i2],
+                    license_lines[j1:j2],
+                )
+            )
+
+    total = (
+        _text_size(window_lines) + _text_size(license_lines)
+    )
+
+    return 2.0 * matches / total if total else 1.0
+
+
+def _length_bound(window_size, license_size):
+    """Returns the upper bound of `ratio` from the sizes of the texts.
+    """
+    total = window_size + license_size
+    return 2.0 * min(window_size, license_size) / total if total else 1.0
+
+
+def _region_lines(windows):
+    return normalize_lines(windows.lines)
+
+
+def window_ratios(windows, licenses, line_count, lines_checked,
+                  worth_computing):
+    """Generator of `(lineno, license, ratio)` for each of `licenses` with
+    `line_count` lines and each window starting in the first `lines_checked`
+    lines of `windows`. `lineno` is zero-based. Pairs for which
+    `worth_computing(license, upper_bound)` is false are skipped.
+    """
+    region_lines = windows.derived("line-hash", _region_lines)
+    previous_lines = None
+
+    for lineno in range(lines_checked):
+        window_lines = region_lines[lineno:lineno + line_count]
+
+        if window_lines != previous_lines:
+            previous_lines = window_lines
+
+            window_size = _text_size(window_lines)
+
+            for license in licenses:
+                license_size = _text_size(
+                    _license_matcher(license.text)[0]
+                )
+
+                if worth_computing(
+                    license,
+                    _length_bound(window_size, license_size),
+                ):
+                    yield lineno, license, ratio(window_lines, license.text)
@@ -0,0 +1,48 @@
+"""Ratcliff-Obershelp license ranking with `difflib`. Exports
+`window_ratios` function.
+"""
+
+import difflib
+
+
+def _window_matchers(windows, line_count, lines_checked):
+    """Generator of `(lineno, matcher)` pairs where each matcher has the
+    window at `lineno` as its cached side. A window identical to the one
+    before it, such as the empty windows past the end of a short file, is
+    skipped since it can't rank higher than the earlier line.
+    """
+    window = None
+
+    for lineno, next_window in enumerate(
+        windows.window_texts(line_count, lines_checked)
+    ):
+        if next_window != window:
+            window = next_window
+            yield lineno, difflib.SequenceMatcher(b=window)
+
+
+def window_ratios(windows, licenses, line_count, lines_checked,
+                  worth_computing):
+    """Generator of `(lineno, license, ratio)` for each of `licenses` with
+    `line_count` lines and each window starting in the first `lines_checked`
+    lines of `windows`. `lineno` is zero-based. Pairs for which
+    `worth_computing(license, upper_bounds)` is false are skipped, with
+    `upper_bounds` the bound functions of the matcher, cheapest first.
+
+    `difflib.SequenceMatcher` preprocesses its second sequence, so every
+    window is indexed once and compared against all the licenses. The license
+    stays the first sequence so ratios are identical to
+    `SequenceMatcher(a=license, b=window).ratio()`.
+    """
+    for lineno, matcher in _window_matchers(
+        windows, line_count, lines_checked
+    ):
+        for license in licenses:
+            matcher.set_seq1(license.text)
+
+            # cheapest upper bound first, one decision for the pair
+            if worth_computing(
+                license,
+                (matcher.real_quick_ratio, matcher.quick_ratio),
+            ):
+                yield lineno, license, matcher.ratio()
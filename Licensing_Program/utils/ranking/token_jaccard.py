@@ -0,0 +1,56 @@
+"""Token Jaccard license ranking. Exports `window_ratios` function.
+
+The ratio is the Jaccard index of the sets of casefolded words in a window
+and in a license. Word order is ignored, which makes it cheap but coarse.
+"""
+
+import functools
+import re
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _tokens(text):
+    return frozenset(_WORD_RE.findall(text.casefold()))
+
+
+@functools.lru_cache(maxsize=None)
+def _license_tokens(license_text):
+    return _tokens(license_text)
+
+
+def _line_tokens(windows):
+    return [_tokens(line) for line in windows.lines]
+
+
+def window_ratios(windows, licenses, line_count, lines_checked,
+                  worth_computing):
+    """Generator of `(lineno, license, ratio)` for each of `licenses` with
+    `line_count` lines and each window starting in the first `lines_checked`
+    lines of `windows`. `lineno` is zero-based. Pairs for which
+    `worth_computing(license, upper_bound)` is false are skipped.
+    """
+    line_tokens = windows.derived("token-jaccard", _line_tokens)
+
+    for lineno in range(lines_checked):
+        window_tokens = frozenset().union(
+            *line_tokens[lineno:lineno + line_count]
+        )
+
+        for license in licenses:
+            license_tokens = _license_tokens(license.text)
+            largest = max(len(window_tokens), len(license_tokens))
+
+            if worth_computing(
+                license,
+                min(len(window_tokens), len(license_tokens)) / largest
+                if largest else 1.0,
+            ):
+                union = len(window_tokens | license_tokens)
+
+                yield (
+                    lineno,
+                    license,
+                    len(window_tokens & license_tokens) / union
+                    if union else 1.0,
+                )
@@ -0,0 +1,153 @@
+"""Exports `LicenseSample` and `HeaderWindows` classes and `rank_windows`
+function.
+"""
+
+import collections
+import itertools
+
+import utils.ranking
+
+# `rank_exponent` lessens the rank of short license headers
+LicenseSample = collections.namedtuple(
+    "LicenseSample",
+    ["name", "text", "line_count", "rank_exponent"],
+)
+
+
+class HeaderWindows:
+    """Windows of consecutive lines over a file's header region. The region
+    is joined once; each window is a slice of that text found through the
+    line offsets, so sliding a window never rebuilds it from its lines.
+    Windows and other data derived from the region are built once and shared
+    by every ranking algorithm.
+    """
+    def __init__(self, lines):
+        self.lines = lines
+        self.text = "".join(lines)
+        self.offsets = [0] + list(itertools.accumulate(map(len, lines)))
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def window(self, start, line_count):
+        """Returns the text of the `line_count` lines starting at zero-based
+        line `start`. Windows past the end of the region are truncated.
+        """
+        start = min(start, len(self))
+        end = min(start + line_count, len(self))
+
+        return self.text[self.offsets[start]:self.offsets[end]]
+
+    def window_texts(self, line_count, lines_checked):
+        """Returns a list of the texts of the `line_count` line windows
+        starting in the first `lines_checked` lines.
+        """
+        return self.derived(
+            ("window_texts", line_count, lines_checked),
+            lambda windows: [
+                windows.window(lineno, line_count)
+                for lineno in range(lines_checked)
+            ],
+        )
+
+    def derived(self, key, func):
+        """Returns `func(self)`, computed only the first time `key` is asked
+        for.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = func(self)
+            return value
+
+
+def rank_windows(windows, corpus, lines_checked,
+                 algorithms=("ratcliff-obershelp",), rank_min=0.0,
+                 pair_counts=None):
+    """Returns a dictionary of algorithm names to lists of
+    `(rank, diff_rank, lineno, license_name)` tuples, one per license in
+    `corpus` that ranks at least `rank_min`, for the best matching window
+    starting in the first `lines_checked` lines of `windows`. `lineno` is
+    one-based. `algorithms` are keys of `utils.ranking.algorithm_dict`; all of
+    them score the same windows in a single pass.
+
+    License/window pairs whose cheap upper bound can't beat the license's
+    best window so far, or can't reach `rank_min`, are pruned before their
+    full ratio is computed. The ranks of the best windows don't change. If
+    `pair_counts` is a `collections.Counter`, its "compared" and "pruned"
+    counts are increased by the amount of pairs of each kind, every pair
+    being counted once.
+    """
+    best = {algorithm : {} for algorithm in algorithms}
+
+    if pair_counts is None:
+        pair_counts = collections.Counter()
+
+    # smallest diff_rank whose rank reaches `rank_min`
+    min_diff_ranks = {
+        license.name : rank_min ** (1 / license.rank_exponent)
+        for license in corpus
+    }
+
+    licenses_by_line_count = collections.OrderedDict()
+    for license in corpus:
+        licenses_by_line_count.setdefault(license.line_count, []).append(
+            license
+        )
+
+    for line_count, licenses in licenses_by_line_count.items():
+        for algorithm in algorithms:
+            algorithm_best = best[algorithm]
+
+            def _prunes(license, upper_bound):
+                return (
+                    upper_bound < min_diff_ranks[license.name]
+                    or (
+                        license.name in algorithm_best
+                        and upper_bound <= algorithm_best[license.name][0]
+                    )
+                )
+
+            def _worth_computing(license, upper_bound, pairs=1):
+                # a tuple of bound functions, cheapest first, is only called
+                # on until one of them prunes the pairs
+                if isinstance(upper_bound, tuple):
+                    bounds = (bound_func() for bound_func in upper_bound)
+                else:
+                    bounds = (upper_bound,)
+
+                if any(_prunes(license, bound) for bound in bounds):
+                    pair_counts["pruned"] += pairs
+                    return False
+                else:
+                    pair_counts["compared"] += pairs
+                    return True
+
+            for lineno, license, diff_rank in utils.ranking.algorithm_dict[
+                algorithm
+            ].window_ratios(
+                windows, licenses, line_count, lines_checked, _worth_computing
+            ):
+                if (
+                    license.name not in algorithm_best
+                    or diff_rank > algorithm_best[license.name][0]
+                ):
+                    algorithm_best[license.name] = (diff_rank, lineno + 1)
+
+    return {
+        algorithm : [
+            (
+                # formula to lessen rank of short headers
+                algorithm_best[license.name][0] ** license.rank_exponent,
+                algorithm_best[license.name][0],
+                algorithm_best[license.name][1],
+                license.name,
+            )
+            for license in corpus
+            if license.name in algorithm_best
+            and algorithm_best[license.name][0] ** license.rank_exponent
+            >= rank_min
+        ]
+        for algorithm, algorithm_best in best.items()
+    }